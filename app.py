@@ -4,24 +4,18 @@ SENTINEL AI - Aadhaar Societal Trends Analysis Platform
 Unlocking enrollment patterns to support informed policy-making
 """
 
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-import numpy as np
 from datetime import datetime
 
-# Import custom modules
-from components.styles import apply_custom_styles, render_header, render_metric_card
-from components.ml_models import train_ml_models
-from utils.data_processing import analyze_single_dataset, analyze_multiple_datasets
-from data_cleanser import SentinelDataCleanser
-
-# Import all tab renderers
-from tabs.tab_overview import render_overview_tab
-from tabs.tab_geographic import render_geographic_tab
-from tabs.tab_trends import render_trends_tab
-from tabs.tab_ai_models import render_ai_models_tab
-from tabs.tab_alerts import render_alerts_tab
-from tabs.tab_quality import render_quality_tab
+# Import custom modules (sklearn/plotly-backed modules and tab renderers are
+# imported where they are used so the welcome screen doesn't pay for them)
+from components.styles import apply_custom_styles, render_header, render_metric_row, render_card_grid, stat_card_html, feature_card_html
 
 # Page configuration
 st.set_page_config(
@@ -30,21 +24,88 @@ st.set_page_config(
     page_icon="🛡️"
 )
 
-# Initialize session state
-if 'data_processed' not in st.session_state:
-    st.session_state.data_processed = False
-if 'district_data' not in st.session_state:
-    st.session_state.district_data = None
-if 'ml_results' not in st.session_state:
-    st.session_state.ml_results = None
-if 'cleansing_report' not in st.session_state:
-    st.session_state.cleansing_report = None
+# Uploads larger than this are parsed and cleansed in row batches to lower peak memory;
+# must stay below server.maxUploadSize in .streamlit/config.toml (200 MB)
+STREAM_BYTES = 64 * 1024 * 1024
+STREAM_BATCH_ROWS = 100_000
 
-# Apply styling
-apply_custom_styles()
+# Whole-number count/volume columns: float32 is exact only up to 2**24, so these stay float64
+VOLUME_COLS = ('total_updates', 'youth_updates', 'adult_updates',
+               'enrol_total', 'demo_total', 'bio_total', 'gap', 'gap_abs')
 
-# Header with Societal Focus
-st.markdown("""
+
+@st.cache_resource(show_spinner=False)
+def _get_cleanser(contamination=0.05):
+    """One shared cleanser per contamination level for the process lifetime"""
+    from data_cleanser import SentinelDataCleanser
+    return SentinelDataCleanser(contamination=contamination, verbose=False, n_jobs=-1)
+
+
+@st.cache_data(show_spinner=False, max_entries=16, persist="disk")
+def _parse_and_clean(raw, contamination):
+    """Parse and cleanse one uploaded CSV, memoized on disk by content and contamination"""
+    from utils.data_processing import read_csv_fast, iter_csv_batches
+    cleanser = _get_cleanser(contamination)
+    if len(raw) > STREAM_BYTES:
+        return cleanser.clean_batches(iter_csv_batches(io.BytesIO(raw), batch_size=STREAM_BATCH_ROWS))
+    df_raw = read_csv_fast(io.BytesIO(raw))
+    return cleanser.clean_pipeline(df_raw)
+
+
+def _load_cleansed(file, contamination=0.05):
+    """Return (df_clean, report) for an upload from the disk-persisted parse/cleanse cache"""
+    return _parse_and_clean(file.getvalue(), contamination)
+
+
+# Filename fragment -> dataset kind, checked in priority order
+_KIND_MAP = [('enrol', 'enrol'), ('demo', 'demo'), ('bio', 'bio')]
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _analyze(df_enrol, df_demo, df_bio, files_count):
+    """Aggregate cleansed datasets into district-level patterns"""
+    from utils.data_processing import analyze_single_dataset, analyze_multiple_datasets
+    if files_count >= 2:
+        return analyze_multiple_datasets(df_enrol, df_demo, df_bio)
+    if df_enrol is not None:
+        return analyze_single_dataset(df_enrol, 'enrol')
+    if df_demo is not None:
+        return analyze_single_dataset(df_demo, 'demo')
+    return analyze_single_dataset(df_bio, 'bio')
+
+
+def _shrink(df):
+    """Downcast float64 score/ratio columns and int64 columns to halve the memory read by every aggregate"""
+    for col in df.select_dtypes('float64').columns:
+        if col in VOLUME_COLS:
+            continue
+        df[col] = df[col].astype('float32')
+    for col in df.select_dtypes('int64').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    return df
+
+
+def _compute_summary(data, files_count):
+    """Aggregate the dashboard headline statistics once per analysis"""
+    summary = {
+        'high_activity': int((data['risk_level'].to_numpy() == 'CRITICAL').sum()),
+        'top_district': data.iat[0, data.columns.get_loc('district')],
+        'top_state': data['state'].value_counts().idxmax(),
+        'ml_high': int((data['ml_risk_level'].to_numpy() == 'CRITICAL').sum()) if 'ml_risk_level' in data.columns else 0
+    }
+    if files_count >= 2:
+        summary['total_gap'] = data['gap'].clip(lower=0).sum() if 'gap' in data.columns else 0
+        summary['avg_completion'] = data['compliance_rate'].mean() if 'compliance_rate' in data.columns else 0
+    else:
+        summary['total_updates'] = int(data['total_updates'].sum()) if 'total_updates' in data.columns else 0
+        summary['avg_youth'] = data['youth_ratio'].mean() if 'youth_ratio' in data.columns else 0
+    if 'youth_ratio' in data.columns:
+        summary['high_youth_districts'] = int((data['youth_ratio'].to_numpy() > 70).sum())
+    return summary
+
+
+# Static page chrome, built once at import instead of on every rerun
+HEADER_HTML = """
 <div style='text-align: center; padding: 20px 0;'>
     <h1 style='font-size: 4.5rem; font-weight: 900; margin: 0; 
                background: linear-gradient(135deg, #667eea 0%, #764ba2 50%, #f093fb 100%);
@@ -60,10 +121,9 @@ st.markdown("""
         Unlocking enrollment patterns to support informed policy-making
     </p>
 </div>
-""", unsafe_allow_html=True)
+"""
 
-# Disclaimer
-st.markdown("""
+DISCLAIMER_HTML = """
 <div style='background: rgba(255,243,205,0.3); padding: 15px; border-radius: 8px; 
             border-left: 4px solid #667eea; margin: 20px 0;'>
     <p style='margin: 0; font-size: 0.9rem; color: #1a1a1a;'>
@@ -73,7 +133,74 @@ st.markdown("""
         not individual citizen assessments.
     </p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+
+@st.cache_data(show_spinner=False)
+def _youth_insight_html(high_youth_districts):
+    """Demographic-trends insight card, memoized per district count"""
+    return f"""
+    <div style='background: rgba(255,255,255,0.95); padding: 20px; border-radius: 12px; 
+                margin: 15px 0; border-left: 5px solid #667eea; box-shadow: 0 4px 12px rgba(0,0,0,0.1);'>
+        <h4 style='color: #667eea; margin: 0 0 10px 0;'>👥 Demographic Trends</h4>
+        <p style='margin: 8px 0; font-weight: 600; color: #2d2d2d;'>
+            📌 <strong>Finding:</strong> {high_youth_districts} districts show youth-dominant enrollment patterns
+        </p>
+        <p style='margin: 8px 0; color: #4a4a4a; line-height: 1.6;'>
+            💡 <strong>Interpretation:</strong> This correlates with education migration hubs, first-time enrollment drives, 
+            and urban-rural youth mobility. Suggests administrative capacity planning needed for youth-centric services.
+        </p>
+        <p style='margin: 8px 0; padding: 10px; background: rgba(102,126,234,0.1); 
+                   border-radius: 6px; color: #1a1a1a;'>
+            ✅ <strong>Actionable:</strong> Deploy mobile enrollment units near educational institutions during admission seasons.
+        </p>
+    </div>
+    """
+
+
+@st.cache_data(show_spinner=False)
+def _geo_insight_html(top_state):
+    """Geographic load insight card, memoized per top state"""
+    return f"""
+    <div style='background: rgba(255,255,255,0.95); padding: 20px; border-radius: 12px; 
+                margin: 15px 0; border-left: 5px solid #2ed573; box-shadow: 0 4px 12px rgba(0,0,0,0.1);'>
+        <h4 style='color: #2ed573; margin: 0 0 10px 0;'>🗺️ Geographic Load Distribution</h4>
+        <p style='margin: 8px 0; font-weight: 600; color: #2d2d2d;'>
+            📌 <strong>Finding:</strong> {top_state} shows highest administrative activity concentration
+        </p>
+        <p style='margin: 8px 0; color: #4a4a4a; line-height: 1.6;'>
+            💡 <strong>Interpretation:</strong> High enrollment/update density indicates population growth centers, 
+            migration destination states, and improved digital infrastructure adoption.
+        </p>
+        <p style='margin: 8px 0; padding: 10px; background: rgba(46,213,115,0.1); 
+                   border-radius: 6px; color: #1a1a1a;'>
+            ✅ <strong>Actionable:</strong> Increase permanent enrollment centers in {top_state}; 
+            analyze staffing ratios vs. population density.
+        </p>
+    </div>
+    """
+
+
+# Initialize session state
+if 'data_processed' not in st.session_state:
+    st.session_state.data_processed = False
+if 'district_data' not in st.session_state:
+    st.session_state.district_data = None
+if 'ml_results' not in st.session_state:
+    st.session_state.ml_results = None
+if 'cleansing_report' not in st.session_state:
+    st.session_state.cleansing_report = None
+if 'summary' not in st.session_state:
+    st.session_state.summary = None
+
+# Apply styling
+apply_custom_styles()
+
+# Header with Societal Focus
+st.markdown(HEADER_HTML, unsafe_allow_html=True)
+
+# Disclaimer
+st.markdown(DISCLAIMER_HTML, unsafe_allow_html=True)
 
 # File Upload Section
 col1, col2, col3 = st.columns([1, 2, 1])
@@ -89,47 +216,49 @@ with col2:
         if uploaded_files_list:
             if st.button("🚀 Analyze Trends", use_container_width=True):
                 with st.spinner("🧠 Processing enrollment data and identifying patterns..."):
+                    from components.ml_models import train_ml_models, RISK_LEVEL_DTYPE
+                    from utils.data_processing import normalize_columns, normalize_labels
+                    
                     files_count = len(uploaded_files_list)
-                    df_enrol = df_demo = df_bio = None
+                    buckets = {'enrol': None, 'demo': None, 'bio': None}
                     
                     # Cleansing statistics
                     total_rows_before = total_rows_after = 0
+                    quality_sum = 0.0
                     all_reports = []
-                    cleanser = SentinelDataCleanser(contamination=0.05, verbose=False)
+                    
+                    # Parse + apply ML-powered cleansing to all files in parallel
+                    # (workers share this run's context so caches/session state work)
+                    with ThreadPoolExecutor(
+                        max_workers=min(files_count, os.cpu_count() or 1),
+                        initializer=add_script_run_ctx,
+                        initargs=(None, get_script_run_ctx())
+                    ) as pool:
+                        cleansed = list(pool.map(_load_cleansed, uploaded_files_list))
                     
                     # Process each file
-                    for file in uploaded_files_list:
-                        df_raw = pd.read_csv(file)
-                        rows_before = len(df_raw)
+                    for file, (df_clean, cleansing_report) in zip(uploaded_files_list, cleansed):
+                        rows_before = cleansing_report['original_rows']
                         total_rows_before += rows_before
                         
-                        # Apply ML-powered cleansing
-                        df_clean, cleansing_report = cleanser.clean_pipeline(df_raw)
                         rows_after = len(df_clean)
                         total_rows_after += rows_after
                         all_reports.append(cleansing_report)
+                        quality_sum += cleansing_report['quality']['avg_quality_score']
                         
                         # Standardization
-                        df_clean.columns = [c.strip().lower().replace('_', ' ') for c in df_clean.columns]
+                        df_clean.columns = normalize_columns(df_clean.columns)
                         for col in ['state', 'district']:
                             if col in df_clean.columns:
-                                df_clean[col] = df_clean[col].str.strip().str.title()
+                                df_clean[col] = normalize_labels(df_clean[col])
                         
                         # Classify dataset
                         filename = file.name.lower()
-                        if 'enrol' in filename or 'enrollment' in filename:
-                            df_enrol = df_clean
-                        elif 'demo' in filename or 'demographic' in filename:
-                            df_demo = df_clean
-                        elif 'bio' in filename or 'biometric' in filename:
-                            df_bio = df_clean
-                        else:
-                            if df_enrol is None:
-                                df_enrol = df_clean
-                            elif df_demo is None:
-                                df_demo = df_clean
-                            else:
-                                df_bio = df_clean
+                        kind = next((k for frag, k in _KIND_MAP if frag in filename), None)
+                        if kind is None:
+                            # Unlabelled files fill the first free slot; extras land in bio
+                            kind = next((k for k in ('enrol', 'demo') if buckets[k] is None), 'bio')
+                        buckets[kind] = df_clean
                     
                     # Store cleansing report
                     st.session_state.cleansing_report = {
@@ -145,30 +274,23 @@ with col2:
                         rows_removed = total_rows_before - total_rows_after
                         st.success(f"✨ Data Quality Enhancement: {rows_removed:,} incomplete records filtered ({(rows_removed/total_rows_before*100):.1f}%)")
                         
-                        if all_reports and 'quality' in all_reports[0]:
-                            avg_quality = np.mean([r['quality']['avg_quality_score'] for r in all_reports])
+                        if all_reports:
+                            avg_quality = quality_sum / len(all_reports)
                             st.info(f"📊 Data Completeness Score: {avg_quality:.1f}/100")
                     
                     # Analyze datasets (INTERNAL LOGIC UNCHANGED)
-                    if files_count >= 2:
-                        district_data = analyze_multiple_datasets(df_enrol, df_demo, df_bio)
-                    else:
-                        if df_enrol is not None:
-                            single_df = df_enrol
-                            dtype = 'enrol'
-                        elif df_demo is not None:
-                            single_df = df_demo
-                            dtype = 'demo'
-                        else:
-                            single_df = df_bio
-                            dtype = 'bio'
-                        district_data = analyze_single_dataset(single_df, dtype)
+                    district_data = _analyze(buckets['enrol'], buckets['demo'], buckets['bio'], files_count)
                     
                     # Train ML models (INTERNAL LOGIC UNCHANGED)
                     district_data, ml_results = train_ml_models(district_data, files_count)
+                    district_data['risk_level'] = district_data['risk_level'].astype(RISK_LEVEL_DTYPE)
+                    # States repeat across districts: integer codes make tab filters and groupbys cheap
+                    district_data['state'] = district_data['state'].astype('category')
+                    district_data = _shrink(district_data)
                     
                     st.session_state.district_data = district_data
                     st.session_state.ml_results = ml_results
+                    st.session_state.summary = _compute_summary(district_data, files_count)
                     st.session_state.data_processed = True
                     st.session_state.files_count = files_count
                 st.rerun()
@@ -177,6 +299,9 @@ with col2:
 if st.session_state.data_processed and st.session_state.district_data is not None:
     data = st.session_state.district_data
     files_count = st.session_state.get('files_count', 1)
+    if st.session_state.summary is None:
+        st.session_state.summary = _compute_summary(data, files_count)
+    summary = st.session_state.summary
     
     # Helper function to translate internal terms to user-facing terms
     def display_term(internal_term):
@@ -192,34 +317,21 @@ if st.session_state.data_processed and st.session_state.district_data is not Non
     
     # Display top metrics (USER-FACING LABELS)
     if files_count >= 2:
-        high_activity_count = len(data[data['risk_level'] == 'CRITICAL'])  # Internal: risk_level
-        total_gap = data[data['gap'] > 0]['gap'].sum() if 'gap' in data.columns else 0
-        avg_completion = data['compliance_rate'].mean() if 'compliance_rate' in data.columns else 0
-        top_district = data.iloc[0]['district']
-        
         metric_configs = [
-            ("📍 High Activity Zones", high_activity_count, "#667eea"),  # User-facing label
-            ("⏳ Pending Updates", f"{int(total_gap):,}", "#ffa502"),
-            ("✅ Update Completion", f"{avg_completion:.1f}%", "#2ed573"),
-            ("🎯 Top District", top_district, "#764ba2")
+            ("📍 High Activity Zones", summary['high_activity'], "#667eea"),  # User-facing label
+            ("⏳ Pending Updates", f"{int(summary['total_gap']):,}", "#ffa502"),
+            ("✅ Update Completion", f"{summary['avg_completion']:.1f}%", "#2ed573"),
+            ("🎯 Top District", summary['top_district'], "#764ba2")
         ]
     else:
-        high_activity_count = len(data[data['risk_level'] == 'CRITICAL'])  # Internal: risk_level
-        total_updates = int(data['total_updates'].sum()) if 'total_updates' in data.columns else 0
-        avg_youth = data['youth_ratio'].mean() if 'youth_ratio' in data.columns else 0
-        top_district = data.iloc[0]['district']
-        
         metric_configs = [
-            ("📍 High Activity Zones", high_activity_count, "#667eea"),  # User-facing label
-            ("📈 Total Transactions", f"{total_updates:,}", "#ffa502"),
-            ("👥 Youth Enrollment", f"{avg_youth:.1f}%", "#2ed573"),
-            ("🎯 Peak District", top_district, "#764ba2")
+            ("📍 High Activity Zones", summary['high_activity'], "#667eea"),  # User-facing label
+            ("📈 Total Transactions", f"{summary['total_updates']:,}", "#ffa502"),
+            ("👥 Youth Enrollment", f"{summary['avg_youth']:.1f}%", "#2ed573"),
+            ("🎯 Peak District", summary['top_district'], "#764ba2")
         ]
     
-    cols = st.columns(4)
-    for idx, (label, value, color) in enumerate(metric_configs):
-        with cols[idx]:
-            render_metric_card(label, value, color)
+    render_metric_row(metric_configs)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -232,51 +344,16 @@ if st.session_state.data_processed and st.session_state.district_data is not Non
     
     with insights_col1:
         # Youth enrollment insight
-        if 'youth_ratio' in data.columns:
-            avg_youth = data['youth_ratio'].mean()
-            high_youth_districts = len(data[data['youth_ratio'] > 70])
+        if 'high_youth_districts' in summary:
+            high_youth_districts = summary['high_youth_districts']
             
-            st.markdown(f"""
-            <div style='background: rgba(255,255,255,0.95); padding: 20px; border-radius: 12px; 
-                        margin: 15px 0; border-left: 5px solid #667eea; box-shadow: 0 4px 12px rgba(0,0,0,0.1);'>
-                <h4 style='color: #667eea; margin: 0 0 10px 0;'>👥 Demographic Trends</h4>
-                <p style='margin: 8px 0; font-weight: 600; color: #2d2d2d;'>
-                    📌 <strong>Finding:</strong> {high_youth_districts} districts show youth-dominant enrollment patterns
-                </p>
-                <p style='margin: 8px 0; color: #4a4a4a; line-height: 1.6;'>
-                    💡 <strong>Interpretation:</strong> This correlates with education migration hubs, first-time enrollment drives, 
-                    and urban-rural youth mobility. Suggests administrative capacity planning needed for youth-centric services.
-                </p>
-                <p style='margin: 8px 0; padding: 10px; background: rgba(102,126,234,0.1); 
-                           border-radius: 6px; color: #1a1a1a;'>
-                    ✅ <strong>Actionable:</strong> Deploy mobile enrollment units near educational institutions during admission seasons.
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_youth_insight_html(high_youth_districts), unsafe_allow_html=True)
     
     with insights_col2:
         # Geographic concentration insight
-        state_concentration = data.groupby('state')['district'].count().sort_values(ascending=False)
-        top_state = state_concentration.index[0]
+        top_state = summary['top_state']
         
-        st.markdown(f"""
-        <div style='background: rgba(255,255,255,0.95); padding: 20px; border-radius: 12px; 
-                    margin: 15px 0; border-left: 5px solid #2ed573; box-shadow: 0 4px 12px rgba(0,0,0,0.1);'>
-            <h4 style='color: #2ed573; margin: 0 0 10px 0;'>🗺️ Geographic Load Distribution</h4>
-            <p style='margin: 8px 0; font-weight: 600; color: #2d2d2d;'>
-                📌 <strong>Finding:</strong> {top_state} shows highest administrative activity concentration
-            </p>
-            <p style='margin: 8px 0; color: #4a4a4a; line-height: 1.6;'>
-                💡 <strong>Interpretation:</strong> High enrollment/update density indicates population growth centers, 
-                migration destination states, and improved digital infrastructure adoption.
-            </p>
-            <p style='margin: 8px 0; padding: 10px; background: rgba(46,213,115,0.1); 
-                       border-radius: 6px; color: #1a1a1a;'>
-                ✅ <strong>Actionable:</strong> Increase permanent enrollment centers in {top_state}; 
-                analyze staffing ratios vs. population density.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(_geo_insight_html(top_state), unsafe_allow_html=True)
     
     st.markdown("---")
     st.markdown("## 📊 Detailed Analytics Dashboard")
@@ -286,60 +363,27 @@ if st.session_state.data_processed and st.session_state.district_data is not Non
         st.markdown("### 🤖 Pattern Detection Engine Performance")
         ml_results = st.session_state.ml_results
         
-        col1, col2, col3, col4 = st.columns(4)
+        # Empty cells keep each card in its column when a model is missing
+        ml_cards = ['<div></div>'] * 4
+        
+        if 'isolation_forest' in ml_results:
+            pattern_pct = (ml_results['isolation_forest']['anomalies_detected'] / 
+                          ml_results['isolation_forest']['total_samples'] * 100)
+            ml_cards[0] = stat_card_html("🔍 Pattern Detection", f"{pattern_pct:.1f}%", "#667eea", "Unusual Patterns Identified")
         
-        with col1:
-            if 'isolation_forest' in ml_results:
-                pattern_pct = (ml_results['isolation_forest']['anomalies_detected'] / 
-                              ml_results['isolation_forest']['total_samples'] * 100)
-                st.markdown(f"""
-                <div class='metric-card' style='border-left: 4px solid #667eea; text-align: center;'>
-                    <div class='stat-label'>🔍 Pattern Detection</div>
-                    <div style='font-size: 1.8rem; font-weight: 700; color: #667eea; margin: 8px 0;'>
-                        {pattern_pct:.1f}%
-                    </div>
-                    <div style='font-size: 0.8rem; opacity: 0.7;'>Unusual Patterns Identified</div>
-                </div>
-                """, unsafe_allow_html=True)
+        if 'random_forest' in ml_results:
+            accuracy = ml_results['random_forest']['accuracy'] * 100
+            ml_cards[1] = stat_card_html("🎯 Classification Model", f"{accuracy:.1f}%", "#2ed573", "Prediction Accuracy")
         
-        with col2:
-            if 'random_forest' in ml_results:
-                accuracy = ml_results['random_forest']['accuracy'] * 100
-                st.markdown(f"""
-                <div class='metric-card' style='border-left: 4px solid #2ed573; text-align: center;'>
-                    <div class='stat-label'>🎯 Classification Model</div>
-                    <div style='font-size: 1.8rem; font-weight: 700; color: #2ed573; margin: 8px 0;'>
-                        {accuracy:.1f}%
-                    </div>
-                    <div style='font-size: 0.8rem; opacity: 0.7;'>Prediction Accuracy</div>
-                </div>
-                """, unsafe_allow_html=True)
+        if 'gradient_boosting' in ml_results:
+            r2 = ml_results['gradient_boosting']['r2_score'] * 100
+            ml_cards[2] = stat_card_html("📈 Forecasting Model", f"{r2:.1f}%", "#ffa502", "R² Score")
         
-        with col3:
-            if 'gradient_boosting' in ml_results:
-                r2 = ml_results['gradient_boosting']['r2_score'] * 100
-                st.markdown(f"""
-                <div class='metric-card' style='border-left: 4px solid #ffa502; text-align: center;'>
-                    <div class='stat-label'>📈 Forecasting Model</div>
-                    <div style='font-size: 1.8rem; font-weight: 700; color: #ffa502; margin: 8px 0;'>
-                        {r2:.1f}%
-                    </div>
-                    <div style='font-size: 0.8rem; opacity: 0.7;'>R² Score</div>
-                </div>
-                """, unsafe_allow_html=True)
+        if 'ml_ensemble_score' in data.columns:
+            ml_high = summary['ml_high']
+            ml_cards[3] = stat_card_html("🧠 AI Ensemble", ml_high, "#764ba2", "High-Activity Patterns")
         
-        with col4:
-            if 'ml_ensemble_score' in data.columns:
-                ml_high = len(data[data['ml_risk_level'] == 'CRITICAL']) if 'ml_risk_level' in data.columns else 0
-                st.markdown(f"""
-                <div class='metric-card' style='border-left: 4px solid #764ba2; text-align: center;'>
-                    <div class='stat-label'>🧠 AI Ensemble</div>
-                    <div style='font-size: 1.8rem; font-weight: 700; color: #764ba2; margin: 8px 0;'>
-                        {ml_high}
-                    </div>
-                    <div style='font-size: 0.8rem; opacity: 0.7;'>High-Activity Patterns</div>
-                </div>
-                """, unsafe_allow_html=True)
+        render_card_grid(ml_cards, 4)
         
         st.markdown("<br>", unsafe_allow_html=True)
     
@@ -354,43 +398,40 @@ if st.session_state.data_processed and st.session_state.district_data is not Non
     ])
     
     with tab1:
+        from tabs.tab_overview import render_overview_tab
         render_overview_tab(data, files_count)
     
     with tab2:
+        from tabs.tab_geographic import render_geographic_tab
         render_geographic_tab(data, files_count)
     
     with tab3:
+        from tabs.tab_trends import render_trends_tab
         render_trends_tab(data, files_count)
     
     with tab4:
+        from tabs.tab_ai_models import render_ai_models_tab
         render_ai_models_tab(data, st.session_state.ml_results)
     
     with tab5:
+        from tabs.tab_alerts import render_alerts_tab
         render_alerts_tab(data, files_count)
     
     with tab6:
+        from tabs.tab_quality import render_quality_tab
         render_quality_tab(st.session_state.cleansing_report)
 
 else:
     # Welcome screen
     st.markdown("<br><br>", unsafe_allow_html=True)
     
-    col1, col2, col3 = st.columns(3)
-    
     features = [
         ("🔍 Pattern Discovery", "ML-powered identification of enrollment and update trends"),
         ("📊 Societal Insights", "Translate data patterns into policy-relevant findings"),
         ("🗺️ Geographic Analysis", "Regional enrollment dynamics and administrative load mapping")
     ]
     
-    for idx, (title, desc) in enumerate(features):
-        with [col1, col2, col3][idx]:
-            st.markdown(f"""
-            <div class='metric-card' style='text-align: center; min-height: 180px;'>
-                <h3 style='margin-bottom: 15px; font-size: 1.5rem;'>{title}</h3>
-                <p style='opacity: 0.8; font-size: 1rem;'>{desc}</p>
-            </div>
-            """, unsafe_allow_html=True)
+    render_card_grid([feature_card_html(title, desc) for title, desc in features], 3)
     
     st.markdown("<br>", unsafe_allow_html=True)
     st.info("👆 Upload Aadhaar enrollment/update datasets to discover societal trends and patterns", icon="💡")
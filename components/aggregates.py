@@ -0,0 +1,39 @@
+"""
+SENTINEL AI - Shared Aggregates
+================================
+Cached district roll-ups and top-k selection reused across dashboard tabs.
+"""
+
+import streamlit as st
+import numpy as np
+
+
+@st.cache_data(show_spinner=False)
+def state_summary(data):
+    """Per-state average risk score and district count, computed once per data version"""
+    return data.groupby('state', observed=True).agg(
+        avg_risk=('anomaly_score', 'mean'),
+        district_count=('district', 'count')
+    ).reset_index()
+
+
+def top_k(df, k, col):
+    """Rows with the k largest values of col, like nlargest(k, col) but with a linear-time selection"""
+    vals = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    # Rank only the valid values; like nlargest, missing rows (in row order) only pad
+    # the result when k exceeds the number of valid ones
+    missing = np.isnan(vals)
+    valid = np.flatnonzero(~missing)
+    vals = vals[valid]
+    n = len(vals)
+    if k <= 0:
+        return df.iloc[:0]
+    if k >= n:
+        order = valid[np.argsort(-vals, kind='stable')]
+        return df.iloc[np.concatenate([order, np.flatnonzero(missing)[:k - n]])]
+    # k-th largest value; ties at the cut keep the earliest rows, as keep='first' does
+    kth = np.partition(vals, n - k)[n - k]
+    above = np.flatnonzero(vals > kth)
+    idx = np.concatenate([above, np.flatnonzero(vals == kth)[:k - len(above)]])
+    idx.sort()
+    return df.iloc[valid[idx[np.argsort(-vals[idx], kind='stable')]]]
@@ -0,0 +1,18 @@
+"""
+SENTINEL AI - Chart Theme
+==========================
+Plotly template shared by every dashboard figure.
+"""
+
+import plotly.io as pio
+import plotly.graph_objects as go
+
+# Registered once per process; figures pick it up as the default instead of
+# repeating template/background/margin kwargs in every update_layout call.
+# Figures that need different spacing still pass their own margin.
+pio.templates['sentinel'] = go.layout.Template(layout=dict(
+    plot_bgcolor='rgba(255,255,255,0.9)',
+    paper_bgcolor='rgba(0,0,0,0)',
+    margin=dict(t=50, b=40, l=40, r=40)
+))
+pio.templates.default = 'plotly_white+sentinel'
@@ -4,15 +4,47 @@ SENTINEL AI - Machine Learning Models
 Ensemble ML models for advanced anomaly detection.
 """
 
+import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import IsolationForest, RandomForestClassifier, GradientBoostingRegressor
+from numba import njit
+from sklearn.ensemble import IsolationForest, RandomForestClassifier, GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
+from sklearn.metrics import r2_score
 import warnings
 warnings.filterwarnings('ignore')
 
+# Shared ordered dtype for rule-based and ML risk levels
+RISK_LEVEL_DTYPE = pd.CategoricalDtype(categories=['NORMAL', 'HIGH', 'CRITICAL'], ordered=True)
 
+# Histogram boosting wins on large inputs but underfits a few hundred districts
+HIST_GB_MIN_ROWS = 10_000
+
+
+@njit(cache=True)
+def _ensemble_and_bucket(confidence, critical_prob, risk, out_score, out_code):
+    """Blend the three model outputs 40/40/20 and bin into risk-level codes in one pass"""
+    for i in range(confidence.shape[0]):
+        s = confidence[i] * 0.4 + critical_prob[i] * 0.4 + risk[i] * 0.2
+        out_score[i] = s
+        # Right-closed bins (0, 30], (30, 60], (60, 100]; anything else (incl. NaN) is missing
+        if s > 0 and s <= 30:
+            out_code[i] = 0
+        elif s > 30 and s <= 60:
+            out_code[i] = 1
+        elif s > 60 and s <= 100:
+            out_code[i] = 2
+        else:
+            out_code[i] = -1
+
+
+def _hash_frame(df):
+    """Content hash of a DataFrame (headers + values + index) for cache keys"""
+    return tuple(df.columns), pd.util.hash_pandas_object(df, index=True).values.tobytes()
+
+
+@st.cache_data(show_spinner=False, max_entries=8, hash_funcs={pd.DataFrame: _hash_frame})
 def train_ml_models(data, files_count):
     """Train ensemble of ML models for advanced anomaly detection"""
     
@@ -24,12 +56,12 @@ def train_ml_models(data, files_count):
     
     # Filter available columns
     available_features = [col for col in feature_cols if col in data.columns]
-    X = data[available_features].fillna(0)
+    # float32 end to end: the tree ensembles cast to float32 internally anyway
+    X = data[available_features].fillna(0).to_numpy(dtype=np.float32)
     
     # Standardize features
-    scaler = StandardScaler()
+    scaler = StandardScaler(copy=False)
     X_scaled = scaler.fit_transform(X)
-    X_scaled_df = pd.DataFrame(X_scaled, columns=available_features)
     
     results = {}
     
@@ -37,15 +69,20 @@ def train_ml_models(data, files_count):
     iso_forest = IsolationForest(
         contamination=0.15,
         random_state=42,
-        n_estimators=100
+        n_estimators=100,
+        n_jobs=-1
     )
-    data['ml_anomaly_score'] = iso_forest.fit_predict(X_scaled)
-    data['ml_anomaly_confidence'] = -iso_forest.score_samples(X_scaled)
+    # Score once and derive labels from the fitted offset (same rule as predict)
+    iso_forest.fit(X_scaled)
+    scores = iso_forest.score_samples(X_scaled)
+    data['ml_anomaly_score'] = np.where(scores < iso_forest.offset_, -1, 1)
+    data['ml_anomaly_confidence'] = -scores
     
-    # Normalize confidence to 0-100
-    min_conf = data['ml_anomaly_confidence'].min()
-    max_conf = data['ml_anomaly_confidence'].max()
-    data['ml_confidence'] = ((data['ml_anomaly_confidence'] - min_conf) / (max_conf - min_conf) * 100)
+    # Normalize confidence to 0-100 in one NumPy pass
+    conf = data['ml_anomaly_confidence'].to_numpy()
+    lo = conf.min()
+    rng = conf.max() - lo
+    data['ml_confidence'] = (conf - lo) * (100.0 / rng) if rng else 0.0
     
     results['isolation_forest'] = {
         'model': iso_forest,
@@ -53,80 +90,110 @@ def train_ml_models(data, files_count):
         'total_samples': len(data)
     }
     
+    # One hold-out split shared by both supervised models; scoring reuses full-data predictions
+    if len(X) > 10:
+        train_idx, test_idx = train_test_split(np.arange(len(X)), test_size=0.2, random_state=42)
+    
     # Model 2: Random Forest Classifier
-    label_map = {'NORMAL': 0, 'HIGH': 1, 'CRITICAL': 2}
-    y = data['risk_level'].map(label_map)
+    # Category codes follow RISK_LEVEL_DTYPE order: NORMAL=0, HIGH=1, CRITICAL=2
+    y = pd.Categorical(data['risk_level'], dtype=RISK_LEVEL_DTYPE).codes.astype(np.int8)
     
     if len(X) > 10:
-        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
-        
-        rf_classifier = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
-        )
-        rf_classifier.fit(X_train, y_train)
-        
-        rf_probs = rf_classifier.predict_proba(X_scaled)
-        n_classes = rf_probs.shape[1]
-        classes = rf_classifier.classes_
-        
-        data['ml_critical_probability'] = 0.0
-        
-        if 2 in classes:
-            critical_idx = list(classes).index(2)
-            data['ml_critical_probability'] = rf_probs[:, critical_idx] * 100
-        elif n_classes > 1:
-            data['ml_critical_probability'] = rf_probs[:, -1] * 100
+        labels = np.unique(y)
+        if len(labels) < 2:
+            # Every district shares one risk class: a fitted forest could only echo it back
+            rf_classifier = None
+            n_classes = 1
+            data['ml_critical_probability'] = 100.0 if labels[0] == 2 else 0.0
+            accuracy = 1.0
+            importances = np.zeros(len(available_features))
+        else:
+            rf_classifier = RandomForestClassifier(
+                n_estimators=100,
+                max_depth=10,
+                random_state=42,
+                n_jobs=-1
+            )
+            rf_classifier.fit(X_scaled[train_idx], y[train_idx])
+            
+            rf_probs = rf_classifier.predict_proba(X_scaled)
+            n_classes = rf_probs.shape[1]
+            classes = rf_classifier.classes_
+            
+            data['ml_critical_probability'] = 0.0
+            
+            if 2 in classes:
+                critical_idx = int(np.searchsorted(classes, 2))  # classes_ is sorted
+                data['ml_critical_probability'] = rf_probs[:, critical_idx] * 100
+            elif n_classes > 1:
+                data['ml_critical_probability'] = rf_probs[:, -1] * 100
+            
+            accuracy = float(np.mean(classes[rf_probs[test_idx].argmax(axis=1)] == y[test_idx]))
+            importances = rf_classifier.feature_importances_
         
         feature_importance = pd.DataFrame({
             'feature': available_features,
-            'importance': rf_classifier.feature_importances_
+            'importance': importances
         }).sort_values('importance', ascending=False)
         
         results['random_forest'] = {
             'model': rf_classifier,
-            'accuracy': rf_classifier.score(X_test, y_test),
+            'accuracy': accuracy,
             'feature_importance': feature_importance,
             'n_classes': n_classes
         }
     
     # Model 3: Gradient Boosting
-    y_risk = data['anomaly_score']
+    y_risk = data['anomaly_score'].to_numpy()
     
-    if len(X) > 10:
-        X_train, X_test, y_train, y_test = train_test_split(X_scaled, y_risk, test_size=0.2, random_state=42)
-        
-        gb_regressor = GradientBoostingRegressor(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42
-        )
-        gb_regressor.fit(X_train, y_train)
+    if len(X) > 10 and np.ptp(y_risk) == 0:
+        # Constant target: boosting would only reproduce it
+        data['ml_predicted_risk'] = y_risk
+        results['gradient_boosting'] = {
+            'model': None,
+            'r2_score': 1.0,
+            'mean_error': 0.0
+        }
+    elif len(X) > 10:
+        if len(train_idx) >= HIST_GB_MIN_ROWS:
+            gb_regressor = HistGradientBoostingRegressor(
+                max_iter=100,
+                learning_rate=0.1,
+                max_depth=5,
+                random_state=42
+            )
+        else:
+            gb_regressor = GradientBoostingRegressor(
+                n_estimators=100,
+                learning_rate=0.1,
+                max_depth=5,
+                random_state=42
+            )
+        gb_regressor.fit(X_scaled[train_idx], y_risk[train_idx])
         
-        data['ml_predicted_risk'] = gb_regressor.predict(X_scaled)
+        pred_all = gb_regressor.predict(X_scaled)
+        pred_test = pred_all[test_idx]
+        data['ml_predicted_risk'] = pred_all
         
         results['gradient_boosting'] = {
             'model': gb_regressor,
-            'r2_score': gb_regressor.score(X_test, y_test),
-            'mean_error': np.mean(np.abs(y_test - gb_regressor.predict(X_test)))
+            'r2_score': r2_score(y_risk[test_idx], pred_test),
+            'mean_error': np.mean(np.abs(y_risk[test_idx] - pred_test))
         }
     
-    # Ensemble score
+    # Ensemble score + ML-enhanced risk level, fused in one compiled pass
     if 'ml_confidence' in data.columns and 'ml_critical_probability' in data.columns:
-        data['ml_ensemble_score'] = (
-            data['ml_confidence'] * 0.4 +
-            data['ml_critical_probability'] * 0.4 +
-            (data['ml_predicted_risk'] if 'ml_predicted_risk' in data.columns else data['anomaly_score']) * 0.2
-        )
-    
-    # ML-enhanced risk level
-    if 'ml_ensemble_score' in data.columns:
-        data['ml_risk_level'] = pd.cut(
-            data['ml_ensemble_score'],
-            bins=[0, 30, 60, 100],
-            labels=['NORMAL', 'HIGH', 'CRITICAL']
+        risk_col = 'ml_predicted_risk' if 'ml_predicted_risk' in data.columns else 'anomaly_score'
+        score = np.empty(len(data))
+        codes = np.empty(len(data), dtype=np.int8)
+        _ensemble_and_bucket(
+            data['ml_confidence'].to_numpy(dtype=np.float64),
+            data['ml_critical_probability'].to_numpy(dtype=np.float64),
+            data[risk_col].to_numpy(dtype=np.float64),
+            score,
+            codes
         )
+        data['ml_ensemble_score'] = score
+        data['ml_risk_level'] = pd.Categorical.from_codes(codes, dtype=RISK_LEVEL_DTYPE)
     
     return data, results
\ No newline at end of file
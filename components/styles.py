@@ -5,31 +5,16 @@ All CSS styling and visual theme configuration.
 """
 
 import streamlit as st
-import base64
 import os
 
+# Background image served by Streamlit's static file server (see .streamlit/config.toml)
+BG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "bg.png")
+BG_URL = "app/static/bg.png"
 
-def get_base64_bg():
-    """Load background image and convert to base64"""
-    try:
-        if os.path.exists("bg.png"):
-            with open("bg.png", "rb") as f:
-                data = base64.b64encode(f.read()).decode()
-            return f"data:image/png;base64,{data}"
-        else:
-            for path in ["./bg.png", "../bg.png", "bg.png"]:
-                if os.path.exists(path):
-                    with open(path, "rb") as f:
-                        data = base64.b64encode(f.read()).decode()
-                    return f"data:image/png;base64,{data}"
-    except Exception as e:
-        pass
-    return None
 
-
-def apply_custom_styles():
-    """Apply all custom CSS styling to the Streamlit app"""
-    bg_image = get_base64_bg()
+def _build_css():
+    """Build the full app stylesheet"""
+    bg_image = BG_URL if os.path.exists(BG_PATH) else None
     
     bg_style = f"""
         .stApp {{
@@ -45,7 +30,7 @@ def apply_custom_styles():
         }}
     """
     
-    st.markdown(f"""
+    return f"""
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;600;700;900&display=swap');
         
@@ -131,7 +116,16 @@ def apply_custom_styles():
         }}
         
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+
+# Built once at import; apply_custom_styles only re-emits it
+CUSTOM_CSS = _build_css()
+
+
+def apply_custom_styles():
+    """Apply all custom CSS styling to the Streamlit app"""
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 
 def render_header():
@@ -152,11 +146,60 @@ def render_header():
     """, unsafe_allow_html=True)
 
 
+def metric_card_html(label, value, color):
+    """Build the HTML for a styled metric card"""
+    return (
+        f"<div class='metric-card' style='border-left: 4px solid {color};'>"
+        f"<div class='stat-label'>{label}</div>"
+        f"<div class='big-stat' style='color: {color};'>{value}</div>"
+        f"</div>"
+    )
+
+
 def render_metric_card(label, value, color):
     """Render a styled metric card"""
-    st.markdown(f"""
-    <div class='metric-card' style='border-left: 4px solid {color};'>
-        <div class='stat-label'>{label}</div>
-        <div class='big-stat' style='color: {color};'>{value}</div>
-    </div>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown(metric_card_html(label, value, color), unsafe_allow_html=True)
+
+
+def stat_card_html(label, value, color, caption):
+    """Build the HTML for a centred stat card with a caption line"""
+    return (
+        f"<div class='metric-card' style='border-left: 4px solid {color}; text-align: center;'>"
+        f"<div class='stat-label'>{label}</div>"
+        f"<div style='font-size: 1.8rem; font-weight: 700; color: {color}; margin: 8px 0;'>{value}</div>"
+        f"<div style='font-size: 0.8rem; opacity: 0.7;'>{caption}</div>"
+        f"</div>"
+    )
+
+
+def alert_card_html(label, value, color, value_color=None, size='2.5rem'):
+    """Build the HTML for a centred alert count card"""
+    return (
+        f"<div class='metric-card' style='border-left: 4px solid {color}; text-align: center;'>"
+        f"<div class='stat-label'>{label}</div>"
+        f"<div class='big-stat' style='color: {value_color or color}; font-size: {size};'>{value}</div>"
+        f"</div>"
+    )
+
+
+def feature_card_html(title, desc):
+    """Build the HTML for a welcome-screen feature card"""
+    return (
+        f"<div class='metric-card' style='text-align: center; min-height: 180px;'>"
+        f"<h3 style='margin-bottom: 15px; font-size: 1.5rem;'>{title}</h3>"
+        f"<p style='opacity: 0.8; font-size: 1rem;'>{desc}</p>"
+        f"</div>"
+    )
+
+
+def render_card_grid(cards, columns):
+    """Render pre-built card HTML snippets as a single CSS grid element"""
+    st.markdown(
+        f"<div style='display: grid; grid-template-columns: repeat({columns}, 1fr); gap: 1rem;'>{''.join(cards)}</div>",
+        unsafe_allow_html=True
+    )
+
+
+def render_metric_row(metric_configs):
+    """Render a row of metric cards as a single grid element"""
+    render_card_grid([metric_card_html(label, value, color) for label, value, color in metric_configs], len(metric_configs))
\ No newline at end of file
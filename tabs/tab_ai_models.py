@@ -8,8 +8,205 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import components.charts  # registers the default chart template
+from components.aggregates import top_k
 
 
+RISK_COLORS = {'CRITICAL': '#ff4757', 'HIGH': '#ffa502', 'NORMAL': '#2ed573'}
+
+# Districts plotted in the rule-based vs ensemble scatter (random sample above this)
+SCATTER_MAX_POINTS = 1000
+
+
+@st.cache_data(show_spinner=False)
+def _importance_fig(feat_imp):
+    """Random Forest feature importance bar chart"""
+    fig = go.Figure(go.Bar(
+        x=feat_imp['importance'],
+        y=feat_imp['feature'],
+        orientation='h',
+        marker=dict(
+            color=feat_imp['importance'],
+            colorscale='Viridis',
+            showscale=True,
+            colorbar=dict(title="Importance")
+        ),
+        text=feat_imp['importance'].round(3),
+        textposition='outside'
+    ))
+    
+    fig.update_layout(
+        title='Random Forest Feature Importance',
+        height=400,
+        margin=dict(t=50, b=40, l=150, r=40),
+        xaxis_title="Importance Score",
+        yaxis_title="",
+        yaxis={'categoryorder': 'total ascending'}
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _comparison_fig(df):
+    """Rule-based vs ensemble score scatter with an agreement diagonal"""
+    fig = px.scatter(
+        df,
+        x='anomaly_score',
+        y='ml_ensemble_score',
+        color='risk_level',
+        size='ml_confidence' if 'ml_confidence' in df.columns else None,
+        hover_name='district',
+        color_discrete_map=RISK_COLORS,
+        title='Rule-Based vs AI Ensemble Score',
+        labels={'anomaly_score': 'Rule-Based Score', 'ml_ensemble_score': 'AI Ensemble Score'},
+        height=400
+    )
+    
+    # Add diagonal line
+    fig.add_trace(go.Scatter(
+        x=[0, 100],
+        y=[0, 100],
+        mode='lines',
+        name='Perfect Agreement',
+        line=dict(color='gray', dash='dash')
+    ))
+    
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _agreement_fig(levels):
+    """Rule-based vs ML risk level agreement heatmap"""
+    # One hashed pass for all nine cells; axes keep the alphabetical order the old pivot produced
+    order = ['CRITICAL', 'HIGH', 'NORMAL']
+    comp_pivot = (pd.crosstab(levels['risk_level'], levels['ml_risk_level'])
+                  .reindex(index=order, columns=order, fill_value=0))
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=comp_pivot.values,
+        x=comp_pivot.columns,
+        y=comp_pivot.index,
+        colorscale='Blues',
+        text=comp_pivot.values,
+        texttemplate='%{text}',
+        textfont={"size": 14},
+        colorbar=dict(title="Count")
+    ))
+    
+    fig.update_layout(
+        title='Classification Agreement Matrix',
+        height=280,
+        margin=dict(t=50, b=40, l=80, r=40),
+        xaxis_title="ML Model",
+        yaxis_title="Rule-Based"
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _confidence_fig(df):
+    """Anomaly-detection confidence histogram split by risk level"""
+    fig = px.histogram(
+        df,
+        x='ml_confidence',
+        color='risk_level',
+        nbins=30,
+        title='Anomaly Detection Confidence',
+        color_discrete_map=RISK_COLORS,
+        height=320
+    )
+    fig.update_layout(
+        margin=dict(t=40, b=40, l=40, r=10),
+        xaxis_title="ML Confidence Score"
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _probability_fig(df):
+    """Critical-risk probability box plot per risk level"""
+    fig = px.box(
+        df,
+        x='risk_level',
+        y='ml_critical_probability',
+        color='risk_level',
+        title='Critical Risk Probability',
+        color_discrete_map=RISK_COLORS,
+        height=320
+    )
+    fig.update_layout(
+        margin=dict(t=40, b=40, l=40, r=10),
+        yaxis_title="Probability (%)"
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _prediction_fig(df):
+    """Actual vs predicted risk scatter with a perfect-prediction diagonal"""
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df['anomaly_score'],
+        y=df['ml_predicted_risk'],
+        mode='markers',
+        marker=dict(
+            size=5,
+            color=df['ml_confidence'] if 'ml_confidence' in df.columns else '#667eea',
+            colorscale='Viridis',
+            showscale=True
+        ),
+        name='Predictions'
+    ))
+    fig.add_trace(go.Scatter(
+        x=[0, 100],
+        y=[0, 100],
+        mode='lines',
+        line=dict(color='red', dash='dash'),
+        name='Perfect Prediction'
+    ))
+    
+    fig.update_layout(
+        title='Prediction Accuracy',
+        height=320,
+        margin=dict(t=40, b=40, l=40, r=10),
+        xaxis_title="Actual Risk",
+        yaxis_title="Predicted Risk"
+    )
+    return fig
+
+
+@st.cache_data(show_spinner=False)
+def _top_ml_fig(top_ml):
+    """Grouped bars comparing rule-based and ensemble scores for the top ML anomalies"""
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        name='Rule-Based Score',
+        x=top_ml['district'],
+        y=top_ml['anomaly_score'],
+        marker_color='#667eea'
+    ))
+    
+    if 'ml_ensemble_score' in top_ml.columns:
+        fig.add_trace(go.Bar(
+            name='AI Ensemble Score',
+            x=top_ml['district'],
+            y=top_ml['ml_ensemble_score'],
+            marker_color='#ff4757'
+        ))
+    
+    fig.update_layout(
+        title='Top 10 ML-Detected Anomalies: Score Comparison',
+        height=400,
+        barmode='group',
+        margin=dict(t=50, b=80, l=40, r=40),
+        xaxis={'tickangle': 45},
+        yaxis_title="Risk Score"
+    )
+    return fig
+
+
+@st.fragment
 def render_ai_models_tab(data, ml_results):
     """Render the AI Models tab content"""
     st.markdown("### 🤖 AI-Powered Intelligence Models")
@@ -68,35 +265,10 @@ def render_ai_models_tab(data, ml_results):
             
             col1, col2 = st.columns([2, 1])
             
+            feat_imp = ml_results['random_forest']['feature_importance']
+            
             with col1:
-                feat_imp = ml_results['random_forest']['feature_importance']
-                
-                fig_importance = go.Figure(go.Bar(
-                    x=feat_imp['importance'],
-                    y=feat_imp['feature'],
-                    orientation='h',
-                    marker=dict(
-                        color=feat_imp['importance'],
-                        colorscale='Viridis',
-                        showscale=True,
-                        colorbar=dict(title="Importance")
-                    ),
-                    text=feat_imp['importance'].round(3),
-                    textposition='outside'
-                ))
-                
-                fig_importance.update_layout(
-                    title='Random Forest Feature Importance',
-                    height=400,
-                    template='plotly_white',
-                    plot_bgcolor='rgba(255,255,255,0.9)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    margin=dict(t=50, b=40, l=150, r=40),
-                    xaxis_title="Importance Score",
-                    yaxis_title="",
-                    yaxis={'categoryorder': 'total ascending'}
-                )
-                st.plotly_chart(fig_importance, use_container_width=True)
+                st.plotly_chart(_importance_fig(feat_imp), use_container_width=True)
             
             with col2:
                 st.markdown("**📊 Key Insights:**")
@@ -119,35 +291,13 @@ def render_ai_models_tab(data, ml_results):
         with col1:
             # Scatter: Rule-based vs ML
             if 'ml_ensemble_score' in data.columns:
-                fig_comparison = px.scatter(
-                    data.head(100),
-                    x='anomaly_score',
-                    y='ml_ensemble_score',
-                    color='risk_level',
-                    size='ml_confidence' if 'ml_confidence' in data.columns else None,
-                    hover_name='district',
-                    color_discrete_map={'CRITICAL': '#ff4757', 'HIGH': '#ffa502', 'NORMAL': '#2ed573'},
-                    title='Rule-Based vs AI Ensemble Score',
-                    labels={'anomaly_score': 'Rule-Based Score', 'ml_ensemble_score': 'AI Ensemble Score'},
-                    height=400
-                )
-                
-                # Add diagonal line
-                fig_comparison.add_trace(go.Scatter(
-                    x=[0, 100],
-                    y=[0, 100],
-                    mode='lines',
-                    name='Perfect Agreement',
-                    line=dict(color='gray', dash='dash')
-                ))
-                
-                fig_comparison.update_layout(
-                    template='plotly_white',
-                    plot_bgcolor='rgba(255,255,255,0.9)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    margin=dict(t=50, b=40, l=40, r=40)
-                )
-                st.plotly_chart(fig_comparison, use_container_width=True)
+                cols = ['anomaly_score', 'ml_ensemble_score', 'risk_level', 'district']
+                if 'ml_confidence' in data.columns:
+                    cols.append('ml_confidence')
+                scatter_df = data[cols]
+                if len(scatter_df) > SCATTER_MAX_POINTS:
+                    scatter_df = scatter_df.sample(SCATTER_MAX_POINTS, random_state=0)
+                st.plotly_chart(_comparison_fig(scatter_df), use_container_width=True)
         
         with col2:
             # Model agreement analysis
@@ -167,40 +317,7 @@ def render_ai_models_tab(data, ml_results):
                 st.markdown("<br>", unsafe_allow_html=True)
                 
                 # Confusion-style comparison
-                comparison_data = []
-                for rb_level in ['NORMAL', 'HIGH', 'CRITICAL']:
-                    for ml_level in ['NORMAL', 'HIGH', 'CRITICAL']:
-                        count = len(data[(data['risk_level'] == rb_level) & (data['ml_risk_level'] == ml_level)])
-                        comparison_data.append({
-                            'Rule-Based': rb_level,
-                            'ML Model': ml_level,
-                            'Count': count
-                        })
-                
-                comp_df = pd.DataFrame(comparison_data)
-                comp_pivot = comp_df.pivot(index='Rule-Based', columns='ML Model', values='Count')
-                
-                fig_heatmap = go.Figure(data=go.Heatmap(
-                    z=comp_pivot.values,
-                    x=comp_pivot.columns,
-                    y=comp_pivot.index,
-                    colorscale='Blues',
-                    text=comp_pivot.values,
-                    texttemplate='%{text}',
-                    textfont={"size": 14},
-                    colorbar=dict(title="Count")
-                ))
-                
-                fig_heatmap.update_layout(
-                    title='Classification Agreement Matrix',
-                    height=280,
-                    template='plotly_white',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    margin=dict(t=50, b=40, l=80, r=40),
-                    xaxis_title="ML Model",
-                    yaxis_title="Rule-Based"
-                )
-                st.plotly_chart(fig_heatmap, use_container_width=True)
+                st.plotly_chart(_agreement_fig(data[['risk_level', 'ml_risk_level']]), use_container_width=True)
         
         st.markdown("---")
         
@@ -211,82 +328,19 @@ def render_ai_models_tab(data, ml_results):
         
         with col1:
             if 'ml_confidence' in data.columns:
-                fig_conf = px.histogram(
-                    data,
-                    x='ml_confidence',
-                    color='risk_level',
-                    nbins=30,
-                    title='Anomaly Detection Confidence',
-                    color_discrete_map={'CRITICAL': '#ff4757', 'HIGH': '#ffa502', 'NORMAL': '#2ed573'},
-                    height=320
-                )
-                fig_conf.update_layout(
-                    template='plotly_white',
-                    plot_bgcolor='rgba(255,255,255,0.9)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    margin=dict(t=40, b=40, l=40, r=10),
-                    xaxis_title="ML Confidence Score"
-                )
-                st.plotly_chart(fig_conf, use_container_width=True)
+                st.plotly_chart(_confidence_fig(data[['ml_confidence', 'risk_level']]), use_container_width=True)
         
         with col2:
             if 'ml_critical_probability' in data.columns:
-                fig_prob = px.box(
-                    data,
-                    x='risk_level',
-                    y='ml_critical_probability',
-                    color='risk_level',
-                    title='Critical Risk Probability',
-                    color_discrete_map={'CRITICAL': '#ff4757', 'HIGH': '#ffa502', 'NORMAL': '#2ed573'},
-                    height=320
-                )
-                fig_prob.update_layout(
-                    template='plotly_white',
-                    plot_bgcolor='rgba(255,255,255,0.9)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    margin=dict(t=40, b=40, l=40, r=10),
-                    yaxis_title="Probability (%)"
-                )
-                st.plotly_chart(fig_prob, use_container_width=True)
+                st.plotly_chart(_probability_fig(data[['risk_level', 'ml_critical_probability']]), use_container_width=True)
         
         with col3:
             if 'ml_predicted_risk' in data.columns:
                 # Prediction accuracy
-                actual = data['anomaly_score']
-                predicted = data['ml_predicted_risk']
-                
-                fig_pred = go.Figure()
-                fig_pred.add_trace(go.Scatter(
-                    x=actual,
-                    y=predicted,
-                    mode='markers',
-                    marker=dict(
-                        size=5,
-                        color=data['ml_confidence'] if 'ml_confidence' in data.columns else '#667eea',
-                        colorscale='Viridis',
-                        showscale=True
-                    ),
-                    name='Predictions'
-                ))
-                fig_pred.add_trace(go.Scatter(
-                    x=[0, 100],
-                    y=[0, 100],
-                    mode='lines',
-                    line=dict(color='red', dash='dash'),
-                    name='Perfect Prediction'
-                ))
-                
-                fig_pred.update_layout(
-                    title='Prediction Accuracy',
-                    height=320,
-                    template='plotly_white',
-                    plot_bgcolor='rgba(255,255,255,0.9)',
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    margin=dict(t=40, b=40, l=40, r=10),
-                    xaxis_title="Actual Risk",
-                    yaxis_title="Predicted Risk"
-                )
-                st.plotly_chart(fig_pred, use_container_width=True)
+                cols = ['anomaly_score', 'ml_predicted_risk']
+                if 'ml_confidence' in data.columns:
+                    cols.append('ml_confidence')
+                st.plotly_chart(_prediction_fig(data[cols]), use_container_width=True)
         
         st.markdown("---")
         
@@ -294,37 +348,9 @@ def render_ai_models_tab(data, ml_results):
         st.markdown("#### 🚨 Top ML-Identified Anomalies")
         
         if 'ml_confidence' in data.columns:
-            top_ml = data.nlargest(10, 'ml_confidence')
-            
-            fig_top_ml = go.Figure()
-            
-            fig_top_ml.add_trace(go.Bar(
-                name='Rule-Based Score',
-                x=top_ml['district'],
-                y=top_ml['anomaly_score'],
-                marker_color='#667eea'
-            ))
-            
-            if 'ml_ensemble_score' in top_ml.columns:
-                fig_top_ml.add_trace(go.Bar(
-                    name='AI Ensemble Score',
-                    x=top_ml['district'],
-                    y=top_ml['ml_ensemble_score'],
-                    marker_color='#ff4757'
-                ))
-            
-            fig_top_ml.update_layout(
-                title='Top 10 ML-Detected Anomalies: Score Comparison',
-                height=400,
-                barmode='group',
-                template='plotly_white',
-                plot_bgcolor='rgba(255,255,255,0.9)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                margin=dict(t=50, b=80, l=40, r=40),
-                xaxis={'tickangle': 45},
-                yaxis_title="Risk Score"
-            )
-            st.plotly_chart(fig_top_ml, use_container_width=True)
+            top_ml = top_k(data, 10, 'ml_confidence')
+            cols = [c for c in ['district', 'anomaly_score', 'ml_ensemble_score'] if c in top_ml.columns]
+            st.plotly_chart(_top_ml_fig(top_ml[cols]), use_container_width=True)
     
     else:
         st.info("ML models will be trained automatically when you analyze data. Upload datasets to see AI-powered insights!")
\ No newline at end of file
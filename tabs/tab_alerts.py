@@ -4,55 +4,171 @@ SENTINEL AI - Alerts Tab
 Critical alerts dashboard with actionable insights.
 """
 
+import io
+
 import streamlit as st
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
+import components.charts  # registers the default chart template
+from components.ml_models import RISK_LEVEL_DTYPE
+from components.aggregates import top_k
+from components.styles import render_card_grid, alert_card_html
 
 
-def render_alerts_tab(data, files_count):
-    """Render the Alerts & Action Dashboard tab content"""
-    st.markdown("### ⚠️ Critical Alerts & Action Dashboard")
+@st.cache_data(show_spinner=False)
+def _alert_slices(data):
+    """Risk-level subsets and aggregates the alerts tab reads, computed once per data version"""
+    # Integer level codes (NORMAL=0, HIGH=1, CRITICAL=2) give every mask from one array
+    codes = pd.Categorical(data['risk_level'], dtype=RISK_LEVEL_DTYPE).codes
+    affected = data[codes >= 1]
+    return {
+        'critical': data[codes == 2],
+        'high': data[codes == 1],
+        'urgent_count': int((data['anomaly_score'] > 80).sum()),
+        'total_affected': len(affected),
+        'priority': top_k(affected, 20, 'anomaly_score'),
+        'top_critical': top_k(data, 10, 'anomaly_score'),
+        'state_alerts': affected.groupby(['state', 'risk_level']).size().reset_index(name='count'),
+        'severity_counts': data['risk_level'].value_counts().reindex(['CRITICAL', 'HIGH', 'NORMAL'], fill_value=0)
+    }
+
+
+def _recommended_actions(critical_list):
+    """Recommended actions per listed district, with every trigger evaluated as one column mask"""
+    n = len(critical_list)
     
-    critical_districts = data[data['risk_level'] == 'CRITICAL']
-    high_districts = data[data['risk_level'] == 'HIGH']
+    def column(name, default):
+        return critical_list[name].to_numpy() if name in critical_list.columns else np.full(n, default)
     
-    # Alert summary metrics
-    col1, col2, col3, col4 = st.columns(4)
+    gap = column('gap', 0)
+    compliance = column('compliance_rate', 100)
+    triggers = [
+        (gap > 5000, None),
+        (compliance < 50, "📢 Launch immediate biometric awareness campaign"),
+        (compliance < 80, "🎓 Conduct compliance training for local staff"),
+        (column('migration_index', 0) > 2, "🔍 Investigate high address change frequency patterns")
+    ]
     
-    with col1:
-        st.markdown(f"""
-        <div class='metric-card' style='border-left: 4px solid #ff4757; text-align: center;'>
-            <div class='stat-label'>Critical Alerts</div>
-            <div class='big-stat' style='color: #ff4757; font-size: 2.5rem;'>{len(critical_districts)}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    actions = [[] for _ in range(n)]
+    for mask, text in triggers:
+        for i in np.flatnonzero(mask):
+            # The gap action quotes the district's own backlog
+            actions[i].append(text or f"🚨 **URGENT**: Deploy mobile biometric units - {int(gap[i]):,} pending verifications")
+    return actions
+
+
+@st.cache_data(show_spinner=False)
+def _csv_export(df):
+    """Serialize a frame for download with Arrow's C++ CSV writer; reruns reuse the bytes until the data changes"""
+    buf = io.BytesIO()
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), buf)
+    return buf.getvalue()
+
+
+@st.fragment
+def _critical_details(critical_districts, high_districts, files_count):
+    """Critical alert table and detail panel; selecting a row reruns only this block"""
+    # Critical alert table with a detail panel
+    critical_list = critical_districts.head(10)
     
-    with col2:
+    if len(critical_list) > 0:
+        # One table instead of a stack of expanders; details render for the selected row only
+        table_cols = ['district', 'state', 'anomaly_score'] + (
+            ['gap', 'compliance_rate'] if files_count >= 2 else ['total_updates', 'youth_ratio'])
+        event = st.dataframe(
+            critical_list[[c for c in table_cols if c in critical_list.columns]],
+            selection_mode='single-row',
+            on_select='rerun',
+            hide_index=True,
+            use_container_width=True,
+            # Keyed on the listed districts so a new analysis starts with a fresh selection
+            key=f"critical_table_{hash(tuple(critical_list['district']))}"
+        )
+        # A selection kept from other data may point past the end of this list
+        selected = event.selection.rows
+        pos = selected[0] if selected and selected[0] < len(critical_list) else 0
+        row = critical_list.iloc[pos]
+        
+        st.markdown(f"**🔴 {row['district']}, {row['state']} - Risk Score: {row['anomaly_score']:.0f}**")
+        
+        # Visual indicator bar
+        risk_pct = min(row['anomaly_score'], 100)
         st.markdown(f"""
-        <div class='metric-card' style='border-left: 4px solid #ffa502; text-align: center;'>
-            <div class='stat-label'>High Priority</div>
-            <div class='big-stat' style='color: #ffa502; font-size: 2.5rem;'>{len(high_districts)}</div>
-        </div>
+        <div style='background: linear-gradient(90deg, #ff4757 0%, #ff4757 {risk_pct}%, #e0e0e0 {risk_pct}%, #e0e0e0 100%); 
+                    height: 8px; border-radius: 4px; margin-bottom: 15px;'></div>
         """, unsafe_allow_html=True)
+        
+        if files_count >= 2:
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("📊 Demo Updates", f"{int(row.get('demo_total', 0)):,}")
+            c2.metric("🔐 Bio Updates", f"{int(row.get('bio_total', 0)):,}")
+            c3.metric("✅ Compliance", f"{row.get('compliance_rate', 0):.1f}%")
+            c4.metric("⚠️ Gap", f"{int(row.get('gap', 0)):,}")
+            
+            st.markdown("---")
+            st.markdown("**🎯 Recommended Actions:**")
+            
+            actions = _recommended_actions(critical_list)[pos]
+            for action in actions:
+                st.markdown(f"- {action}")
+            
+            if not actions:
+                st.markdown("- 📋 Monitor situation and maintain current protocols")
+            
+        else:
+            c1, c2, c3 = st.columns(3)
+            c1.metric("📈 Total Updates", f"{int(row.get('total_updates', 0)):,}")
+            c2.metric("👥 Youth Ratio", f"{row.get('youth_ratio', 0):.1f}%")
+            c3.metric("📝 Records", f"{int(row.get('record_count', 0)):,}")
+            
+            st.markdown("---")
+            st.markdown("**📋 Observations:**")
+            
+            if row.get('youth_ratio', 50) > 70:
+                st.markdown("- 👶 Unusually high youth enrollment detected (possible migration hub)")
+            if row.get('record_count', 0) > 100:
+                st.markdown("- 📊 High transaction frequency - requires monitoring")
+            if row.get('total_updates', 0) > 10000:
+                st.markdown("- ⚡ Exceptional activity volume - verify legitimacy")
+    else:
+        # Check for HIGH risk districts
+        if len(high_districts) > 0:
+            st.warning(f"⚠️ No CRITICAL alerts, but {len(high_districts)} districts are at HIGH risk. Monitor closely.")
+            
+            # Show top 5 HIGH risk districts
+            st.markdown("#### Top HIGH Risk Districts:")
+            for idx, row in high_districts.head(5).iterrows():
+                st.markdown(f"""
+                <div style='background: rgba(255,165,2,0.1); padding: 12px; border-radius: 8px; margin: 8px 0; border-left: 4px solid #ffa502;'>
+                    <b style='color: #1a1a1a;'>{row['district']}, {row['state']}</b><br>
+                    <span style='color: #ffa502; font-weight: 600;'>Risk Score: {row['anomaly_score']:.0f}</span>
+                </div>
+                """, unsafe_allow_html=True)
+        else:
+            st.success("✅ No critical or high-risk alerts at this time. All districts operating within normal parameters.")
+
+
+@st.fragment
+def render_alerts_tab(data, files_count):
+    """Render the Alerts & Action Dashboard tab content"""
+    st.markdown("### ⚠️ Critical Alerts & Action Dashboard")
     
-    with col3:
-        urgent_count = len(data[data['anomaly_score'] > 80]) if len(data) > 0 else 0
-        st.markdown(f"""
-        <div class='metric-card' style='border-left: 4px solid #e74c3c; text-align: center;'>
-            <div class='stat-label'>Urgent Action</div>
-            <div class='big-stat' style='color: #e74c3c; font-size: 2.5rem;'>{urgent_count}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    slices = _alert_slices(data)
+    critical_districts = slices['critical']
+    high_districts = slices['high']
     
-    with col4:
-        total_affected = len(data[data['risk_level'].isin(['CRITICAL', 'HIGH'])])
-        st.markdown(f"""
-        <div class='metric-card' style='border-left: 4px solid #95a5a6; text-align: center;'>
-            <div class='stat-label'>Total Affected</div>
-            <div class='big-stat' style='color: #2d2d2d; font-size: 2.5rem;'>{total_affected}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    # Alert summary metrics, sent as one grid element
+    render_card_grid([
+        alert_card_html("Critical Alerts", len(critical_districts), '#ff4757'),
+        alert_card_html("High Priority", len(high_districts), '#ffa502'),
+        alert_card_html("Urgent Action", slices['urgent_count'], '#e74c3c'),
+        alert_card_html("Total Affected", slices['total_affected'], '#95a5a6', value_color='#2d2d2d')
+    ], 4)
     
     st.markdown("---")
     
@@ -63,58 +179,59 @@ def render_alerts_tab(data, files_count):
         # Priority action matrix
         st.markdown("#### 🎯 Priority Action Matrix")
         
-        priority_data = data[data['risk_level'].isin(['CRITICAL', 'HIGH'])].nlargest(20, 'anomaly_score')
+        priority_data = slices['priority']
         
         fig_priority = go.Figure()
         
-        # Create scatter plot with urgency levels
-        for risk in ['CRITICAL', 'HIGH']:
-            risk_subset = priority_data[priority_data['risk_level'] == risk]
-            fig_priority.add_trace(go.Scatter(
-                x=risk_subset.index,
-                y=risk_subset['anomaly_score'],
+        with fig_priority.batch_update():
+            # Create scatter plot with urgency levels: one trace styled per point
+            is_critical = (priority_data['risk_level'] == 'CRITICAL').to_numpy()
+            fig_priority.add_trace(go.Scattergl(
+                x=priority_data.index,
+                y=priority_data['anomaly_score'],
                 mode='markers+text',
-                name=risk,
+                showlegend=False,
                 marker=dict(
                     size=15,
-                    color='#ff4757' if risk == 'CRITICAL' else '#ffa502',
-                    symbol='diamond' if risk == 'CRITICAL' else 'circle',
+                    color=np.where(is_critical, '#ff4757', '#ffa502'),
+                    symbol=np.where(is_critical, 'diamond', 'circle'),
                     line=dict(width=2, color='white')
                 ),
-                text=risk_subset['district'].str[:10],
+                text=priority_data['district'].str[:10],
                 textposition='top center',
                 textfont=dict(size=8),
                 hovertemplate='<b>%{text}</b><br>Score: %{y:.0f}<extra></extra>'
             ))
-        
-        fig_priority.update_layout(
-            height=350,
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=10, b=40, l=40, r=10),
-            yaxis_title="Risk Score",
-            xaxis_title="Priority Rank",
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
-        st.plotly_chart(fig_priority, use_container_width=True)
+            
+            # Empty legend-only entries keep the CRITICAL / HIGH key
+            for risk, color, symbol in [('CRITICAL', '#ff4757', 'diamond'), ('HIGH', '#ffa502', 'circle')]:
+                fig_priority.add_trace(go.Scattergl(
+                    x=[None],
+                    y=[None],
+                    mode='markers',
+                    name=risk,
+                    marker=dict(size=15, color=color, symbol=symbol, line=dict(width=2, color='white'))
+                ))
+            
+            fig_priority.update_layout(
+                height=350,
+                margin=dict(t=10, b=40, l=40, r=10),
+                yaxis_title="Risk Score",
+                xaxis_title="Priority Rank",
+                showlegend=True,
+                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+            )
+        st.plotly_chart(fig_priority, use_container_width=True, key='alerts_priority')
     
     with col2:
         # Alert severity breakdown
         st.markdown("#### 📊 Severity Breakdown")
         
-        severity_data = []
-        for risk_level in ['CRITICAL', 'HIGH', 'NORMAL']:
-            count = len(data[data['risk_level'] == risk_level])
-            severity_data.append({'Level': risk_level, 'Count': count})
-        
-        from pandas import DataFrame
-        severity_df = DataFrame(severity_data)
+        severity_counts = slices['severity_counts']
         
         fig_severity = go.Figure(go.Funnel(
-            y=severity_df['Level'],
-            x=severity_df['Count'],
+            y=severity_counts.index.tolist(),
+            x=severity_counts.to_numpy(),
             textposition="inside",
             textinfo="value+percent initial",
             marker=dict(color=['#ff4757', '#ffa502', '#2ed573']),
@@ -123,11 +240,9 @@ def render_alerts_tab(data, files_count):
         
         fig_severity.update_layout(
             height=350,
-            template='plotly_white',
-            paper_bgcolor='rgba(0,0,0,0)',
             margin=dict(t=10, b=10, l=10, r=10)
         )
-        st.plotly_chart(fig_severity, use_container_width=True)
+        st.plotly_chart(fig_severity, use_container_width=True, key='alerts_severity')
     
     st.markdown("---")
     
@@ -137,38 +252,42 @@ def render_alerts_tab(data, files_count):
     with col1:
         st.markdown("#### 🔥 Top 10 Critical Districts - Radar View")
         
-        top_critical = data.nlargest(10, 'anomaly_score')
-        
-        fig_radar = go.Figure()
+        top_critical = slices['top_critical']
         
-        for idx, row in top_critical.head(5).iterrows():
-            fig_radar.add_trace(go.Scatterpolar(
-                r=[row['anomaly_score'], row.get('youth_ratio', 50), 
-                   100 - row.get('compliance_rate', 50) if 'compliance_rate' in row else 50],
-                theta=['Risk Score', 'Youth Ratio', 'Non-Compliance'],
-                fill='toself',
-                name=row['district'][:15]
-            ))
+        # Axis values per district taken column-wise; the traces and layout go into one constructor
+        top5 = top_critical.head(5)
+        n = len(top5)
+        youth = top5['youth_ratio'].to_numpy() if 'youth_ratio' in top5.columns else np.full(n, 50)
+        non_compliance = 100 - top5['compliance_rate'].to_numpy() if 'compliance_rate' in top5.columns else np.full(n, 50)
         
-        fig_radar.update_layout(
-            polar=dict(
-                radialaxis=dict(visible=True, range=[0, 100])
-            ),
-            showlegend=True,
-            height=400,
-            template='plotly_white',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=40, l=40, r=40)
+        fig_radar = go.Figure(
+            data=[
+                go.Scatterpolar(
+                    r=[score, y, nc],
+                    theta=['Risk Score', 'Youth Ratio', 'Non-Compliance'],
+                    fill='toself',
+                    name=district[:15]
+                )
+                for score, y, nc, district in zip(top5['anomaly_score'].to_numpy(), youth, non_compliance, top5['district'])
+            ],
+            layout=dict(
+                polar=dict(
+                    radialaxis=dict(visible=True, range=[0, 100])
+                ),
+                showlegend=True,
+                height=400,
+                margin=dict(t=40, b=40, l=40, r=40)
+            )
         )
-        st.plotly_chart(fig_radar, use_container_width=True)
+        st.plotly_chart(fig_radar, use_container_width=True, key='alerts_radar')
     
     with col2:
         st.markdown("#### 📍 Alert Distribution by State")
         
-        state_alerts = data[data['risk_level'].isin(['CRITICAL', 'HIGH'])].groupby(['state', 'risk_level']).size().reset_index(name='count')
+        state_alerts = slices['state_alerts']
         
         fig_state_alert = px.bar(
-            state_alerts.nlargest(20, 'count'),
+            top_k(state_alerts, 20, 'count'),
             x='count',
             y='state',
             color='risk_level',
@@ -179,94 +298,18 @@ def render_alerts_tab(data, files_count):
         )
         
         fig_state_alert.update_layout(
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
             margin=dict(t=40, b=40, l=10, r=40),
             xaxis_title="Alert Count",
             yaxis_title="",
             legend_title="Alert Level",
             yaxis={'categoryorder': 'total ascending'}
         )
-        st.plotly_chart(fig_state_alert, use_container_width=True)
+        st.plotly_chart(fig_state_alert, use_container_width=True, key='alerts_state')
     
     st.markdown("---")
     st.markdown("#### 🚨 Critical Alert Details")
     
-    # Detailed expandable alerts
-    critical_list = data[data['risk_level'] == 'CRITICAL'].head(10)
-    
-    if len(critical_list) > 0:
-        for idx, row in critical_list.iterrows():
-            # Use simple boolean check instead of numpy bool
-            is_first = (idx == critical_list.index[0])
-            with st.expander(f"🔴 {row['district']}, {row['state']} - Risk Score: {row['anomaly_score']:.0f}", expanded=bool(is_first)):
-                # Visual indicator bar
-                risk_pct = min(row['anomaly_score'], 100)
-                st.markdown(f"""
-                <div style='background: linear-gradient(90deg, #ff4757 0%, #ff4757 {risk_pct}%, #e0e0e0 {risk_pct}%, #e0e0e0 100%); 
-                            height: 8px; border-radius: 4px; margin-bottom: 15px;'></div>
-                """, unsafe_allow_html=True)
-                
-                if files_count >= 2:
-                    c1, c2, c3, c4 = st.columns(4)
-                    c1.metric("📊 Demo Updates", f"{int(row.get('demo_total', 0)):,}")
-                    c2.metric("🔐 Bio Updates", f"{int(row.get('bio_total', 0)):,}")
-                    c3.metric("✅ Compliance", f"{row.get('compliance_rate', 0):.1f}%")
-                    c4.metric("⚠️ Gap", f"{int(row.get('gap', 0)):,}")
-                    
-                    st.markdown("---")
-                    st.markdown("**🎯 Recommended Actions:**")
-                    
-                    actions = []
-                    if row.get('gap', 0) > 5000:
-                        actions.append(f"🚨 **URGENT**: Deploy mobile biometric units - {int(row['gap']):,} pending verifications")
-                    if row.get('compliance_rate', 100) < 50:
-                        actions.append("📢 Launch immediate biometric awareness campaign")
-                    if row.get('compliance_rate', 100) < 80:
-                        actions.append("🎓 Conduct compliance training for local staff")
-                    if row.get('migration_index', 0) > 2:
-                        actions.append("🔍 Investigate high address change frequency patterns")
-                    
-                    for action in actions:
-                        st.markdown(f"- {action}")
-                    
-                    if not actions:
-                        st.markdown("- 📋 Monitor situation and maintain current protocols")
-                    
-                else:
-                    c1, c2, c3 = st.columns(3)
-                    c1.metric("📈 Total Updates", f"{int(row.get('total_updates', 0)):,}")
-                    c2.metric("👥 Youth Ratio", f"{row.get('youth_ratio', 0):.1f}%")
-                    c3.metric("📝 Records", f"{int(row.get('record_count', 0)):,}")
-                    
-                    st.markdown("---")
-                    st.markdown("**📋 Observations:**")
-                    
-                    if row.get('youth_ratio', 50) > 70:
-                        st.markdown("- 👶 Unusually high youth enrollment detected (possible migration hub)")
-                    if row.get('record_count', 0) > 100:
-                        st.markdown("- 📊 High transaction frequency - requires monitoring")
-                    if row.get('total_updates', 0) > 10000:
-                        st.markdown("- ⚡ Exceptional activity volume - verify legitimacy")
-    else:
-        # Check for HIGH risk districts
-        high_districts = data[data['risk_level'] == 'HIGH']
-        
-        if len(high_districts) > 0:
-            st.warning(f"⚠️ No CRITICAL alerts, but {len(high_districts)} districts are at HIGH risk. Monitor closely.")
-            
-            # Show top 5 HIGH risk districts
-            st.markdown("#### Top HIGH Risk Districts:")
-            for idx, row in high_districts.head(5).iterrows():
-                st.markdown(f"""
-                <div style='background: rgba(255,165,2,0.1); padding: 12px; border-radius: 8px; margin: 8px 0; border-left: 4px solid #ffa502;'>
-                    <b style='color: #1a1a1a;'>{row['district']}, {row['state']}</b><br>
-                    <span style='color: #ffa502; font-weight: 600;'>Risk Score: {row['anomaly_score']:.0f}</span>
-                </div>
-                """, unsafe_allow_html=True)
-        else:
-            st.success("✅ No critical or high-risk alerts at this time. All districts operating within normal parameters.")
+    _critical_details(critical_districts, high_districts, files_count)
     
     # Export section
     st.markdown("---")
@@ -276,21 +319,23 @@ def render_alerts_tab(data, files_count):
         st.markdown("**📥 Export Options**")
     
     with col2:
-        csv = data.to_csv(index=False)
+        csv = _csv_export(data)
         st.download_button(
             "📄 Full Report (CSV)", 
             csv, 
             f"sentinel_full_report_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", 
             "text/csv", 
+            on_click='ignore',
             use_container_width=True
         )
     
     with col3:
-        critical_csv = data[data['risk_level'] == 'CRITICAL'].to_csv(index=False)
+        critical_csv = _csv_export(critical_districts)
         st.download_button(
             "🚨 Critical Only", 
             critical_csv, 
             f"sentinel_critical_{datetime.now().strftime('%Y%m%d_%H%M')}.csv", 
             "text/csv", 
+            on_click='ignore',
             use_container_width=True
         )
\ No newline at end of file
@@ -5,18 +5,173 @@ Geographic intelligence analysis and state-level visualizations.
 """
 
 import streamlit as st
+import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import components.charts  # registers the default chart template
+from components.aggregates import state_summary as summarize_states, top_k
 
 
+# Districts drawn individually in the treemap; the rest are grouped per state
+TREEMAP_MAX_DISTRICTS = 200
+
+
+@st.cache_data(show_spinner=False)
+def _treemap_fig(tree_data):
+    """State → district risk treemap, with the low-risk tail folded per state"""
+    values_col = 'anomaly_score'
+    if len(tree_data) > TREEMAP_MAX_DISTRICTS:
+        # Keep the riskiest districts and fold the tail into one "Other" tile per state.
+        # Tile area adds up, so "Other" is sized by the tail's total score; its colour is
+        # the score-weighted mean, as plotly colours a parent from its children, so every
+        # state keeps the area and colour it has with all districts drawn
+        top = top_k(tree_data, TREEMAP_MAX_DISTRICTS, 'anomaly_score')
+        tail = tree_data.drop(top.index)
+        other = (tail.assign(score_sq=tail['anomaly_score'] ** 2)
+                 .groupby('state', observed=True, as_index=False)
+                 .agg(total_score=('anomaly_score', 'sum'), score_sq=('score_sq', 'sum')))
+        other['anomaly_score'] = (other['score_sq'] / other['total_score']).fillna(0)
+        tree_data = pd.concat([
+            top.assign(total_score=top['anomaly_score']),
+            other.drop(columns='score_sq').assign(district='Other')
+        ], ignore_index=True)
+        values_col = 'total_score'
+    
+    fig_tree = px.treemap(
+        tree_data,
+        path=['state', 'district'],
+        values=values_col,
+        color='anomaly_score',
+        color_continuous_scale='RdYlGn_r',
+        title='Risk Hierarchy: States → Districts',
+        height=450
+    )
+    fig_tree.update_layout(
+        margin=dict(t=40, b=10, l=10, r=10)
+    )
+    fig_tree.update_traces(textposition='middle center', textfont_size=11)
+    return fig_tree
+
+
+@st.cache_data(show_spinner=False)
+def _sunburst_fig(sun_data):
+    """Risk level → state → district sunburst"""
+    fig_sun = px.sunburst(
+        sun_data,
+        path=['risk_level', 'state', 'district'],
+        values='anomaly_score',
+        color='anomaly_score',
+        color_continuous_scale='Reds',
+        title='Hierarchical Risk View',
+        height=450
+    )
+    fig_sun.update_layout(
+        margin=dict(t=40, b=10, l=10, r=10)
+    )
+    return fig_sun
+
+
+@st.cache_data(show_spinner=False)
+def _state_bar_fig(state_summary):
+    """Top 15 states by average risk score"""
+    fig_state = go.Figure()
+    top_states = state_summary.sort_values('Avg Risk Score', ascending=False).head(15)
+    
+    fig_state.add_trace(go.Bar(
+        x=top_states['Avg Risk Score'],
+        y=top_states['State'],
+        orientation='h',
+        marker=dict(
+            color=top_states['Avg Risk Score'],
+            colorscale='Reds',
+            showscale=True,
+            colorbar=dict(title="Risk Score")
+        ),
+        text=top_states['Avg Risk Score'].round(1),
+        textposition='outside',
+        hovertemplate='<b>%{y}</b><br>Risk Score: %{x:.1f}<extra></extra>'
+    ))
+    
+    fig_state.update_layout(
+        title='Top 15 States by Average Risk Score',
+        height=450,
+        margin=dict(t=50, b=40, l=10, r=40),
+        xaxis_title="Average Risk Score",
+        yaxis_title="",
+        yaxis={'categoryorder': 'total ascending'}
+    )
+    return fig_state
+
+
+@st.cache_data(show_spinner=False)
+def _state_scatter_fig(state_summary):
+    """State risk vs district count scatter"""
+    fig_scatter_state = px.scatter(
+        state_summary,
+        x='District Count',
+        y='Avg Risk Score',
+        size='District Count',
+        color='Avg Risk Score',
+        text='State',
+        color_continuous_scale='RdYlGn_r',
+        title='State Risk vs District Density',
+        height=450,
+        render_mode='webgl'
+    )
+    fig_scatter_state.update_traces(
+        textposition='top center',
+        textfont_size=9
+    )
+    return fig_scatter_state
+
+
+@st.cache_data(show_spinner=False)
+def _bubble_fig(top_district_states):
+    """Top 10 states by district count"""
+    fig_bubble = px.scatter(
+        top_district_states,
+        x='State',
+        y='District Count',
+        size='District Count',
+        color='Avg Risk Score',
+        color_continuous_scale='Reds',
+        title='Top 10 States by Districts',
+        height=300
+    )
+    fig_bubble.update_layout(
+        margin=dict(t=40, b=40, l=40, r=10),
+        xaxis={'tickangle': 45}
+    )
+    return fig_bubble
+
+
+@st.cache_data(show_spinner=False)
+def _risk_dist_fig(risk_state_data):
+    """Risk level counts for the five riskiest states"""
+    fig_risk_dist = px.histogram(
+        risk_state_data,
+        x='state',
+        color='risk_level',
+        title='Risk Distribution - Top 5 States',
+        color_discrete_map={'CRITICAL': '#ff4757', 'HIGH': '#ffa502', 'NORMAL': '#2ed573'},
+        barmode='group',
+        height=300
+    )
+    fig_risk_dist.update_layout(
+        margin=dict(t=40, b=40, l=40, r=10),
+        xaxis={'tickangle': 45},
+        xaxis_title="State",
+        yaxis_title="Count"
+    )
+    return fig_risk_dist
+
+
+@st.fragment
 def render_geographic_tab(data, files_count):
     """Render the Geographic Intelligence tab content"""
     st.markdown("### 🗺️ Geographic Intelligence Analysis")
     
-    state_summary = data.groupby('state').agg({
-        'anomaly_score': 'mean',
-        'district': 'count'
-    }).reset_index()
+    state_summary = summarize_states(data)
     state_summary.columns = ['State', 'Avg Risk Score', 'District Count']
     
     # Top row - Main geographic visualizations
@@ -24,40 +179,11 @@ def render_geographic_tab(data, files_count):
     
     with col1:
         # Treemap showing states sized by district count, colored by risk
-        fig_tree = px.treemap(
-            data,
-            path=['state', 'district'],
-            values='anomaly_score',
-            color='anomaly_score',
-            color_continuous_scale='RdYlGn_r',
-            title='Risk Hierarchy: States → Districts',
-            height=450
-        )
-        fig_tree.update_layout(
-            template='plotly_white',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=10, l=10, r=10)
-        )
-        fig_tree.update_traces(textposition='middle center', textfont_size=11)
-        st.plotly_chart(fig_tree, use_container_width=True)
+        st.plotly_chart(_treemap_fig(data[['state', 'district', 'anomaly_score']]), use_container_width=True, key='geo_treemap')
     
     with col2:
         # Sunburst chart for hierarchical view
-        fig_sun = px.sunburst(
-            data.head(50),
-            path=['risk_level', 'state', 'district'],
-            values='anomaly_score',
-            color='anomaly_score',
-            color_continuous_scale='Reds',
-            title='Hierarchical Risk View',
-            height=450
-        )
-        fig_sun.update_layout(
-            template='plotly_white',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=10, l=10, r=10)
-        )
-        st.plotly_chart(fig_sun, use_container_width=True)
+        st.plotly_chart(_sunburst_fig(data.head(50)[['risk_level', 'state', 'district', 'anomaly_score']]), use_container_width=True, key='geo_sunburst')
     
     st.markdown("---")
     
@@ -66,61 +192,11 @@ def render_geographic_tab(data, files_count):
     
     with col1:
         # Enhanced state risk bar chart with gradient
-        fig_state = go.Figure()
-        top_states = state_summary.sort_values('Avg Risk Score', ascending=False).head(15)
-        
-        fig_state.add_trace(go.Bar(
-            x=top_states['Avg Risk Score'],
-            y=top_states['State'],
-            orientation='h',
-            marker=dict(
-                color=top_states['Avg Risk Score'],
-                colorscale='Reds',
-                showscale=True,
-                colorbar=dict(title="Risk Score")
-            ),
-            text=top_states['Avg Risk Score'].round(1),
-            textposition='outside',
-            hovertemplate='<b>%{y}</b><br>Risk Score: %{x:.1f}<extra></extra>'
-        ))
-        
-        fig_state.update_layout(
-            title='Top 15 States by Average Risk Score',
-            height=450,
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=50, b=40, l=10, r=40),
-            xaxis_title="Average Risk Score",
-            yaxis_title="",
-            yaxis={'categoryorder': 'total ascending'}
-        )
-        st.plotly_chart(fig_state, use_container_width=True)
+        st.plotly_chart(_state_bar_fig(state_summary), use_container_width=True, key='geo_state_risk')
     
     with col2:
         # Scatter plot: District count vs Risk score
-        fig_scatter_state = px.scatter(
-            state_summary,
-            x='District Count',
-            y='Avg Risk Score',
-            size='District Count',
-            color='Avg Risk Score',
-            text='State',
-            color_continuous_scale='RdYlGn_r',
-            title='State Risk vs District Density',
-            height=450
-        )
-        fig_scatter_state.update_traces(
-            textposition='top center',
-            textfont_size=9
-        )
-        fig_scatter_state.update_layout(
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=50, b=40, l=40, r=40)
-        )
-        st.plotly_chart(fig_scatter_state, use_container_width=True)
+        st.plotly_chart(_state_scatter_fig(state_summary), use_container_width=True, key='geo_state_scatter')
     
     st.markdown("---")
     
@@ -129,55 +205,17 @@ def render_geographic_tab(data, files_count):
     
     with col1:
         # Districts per state bubble chart
-        top_district_states = state_summary.nlargest(10, 'District Count')
-        fig_bubble = px.scatter(
-            top_district_states,
-            x='State',
-            y='District Count',
-            size='District Count',
-            color='Avg Risk Score',
-            color_continuous_scale='Reds',
-            title='Top 10 States by Districts',
-            height=300
-        )
-        fig_bubble.update_layout(
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=40, l=40, r=10),
-            xaxis={'tickangle': 45}
-        )
-        st.plotly_chart(fig_bubble, use_container_width=True)
+        st.plotly_chart(_bubble_fig(top_k(state_summary, 10, 'District Count')), use_container_width=True, key='geo_bubble')
     
     with col2:
         # Risk level distribution by top states
-        top_5_states = state_summary.nlargest(5, 'Avg Risk Score')['State'].tolist()
-        risk_state_data = data[data['state'].isin(top_5_states)]
-        
-        fig_risk_dist = px.histogram(
-            risk_state_data,
-            x='state',
-            color='risk_level',
-            title='Risk Distribution - Top 5 States',
-            color_discrete_map={'CRITICAL': '#ff4757', 'HIGH': '#ffa502', 'NORMAL': '#2ed573'},
-            barmode='group',
-            height=300
-        )
-        fig_risk_dist.update_layout(
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=40, l=40, r=10),
-            xaxis={'tickangle': 45},
-            xaxis_title="State",
-            yaxis_title="Count"
-        )
-        st.plotly_chart(fig_risk_dist, use_container_width=True)
+        top_5_states = top_k(state_summary, 5, 'Avg Risk Score')['State'].tolist()
+        st.plotly_chart(_risk_dist_fig(data.loc[data['state'].isin(top_5_states), ['state', 'risk_level']]), use_container_width=True, key='geo_risk_dist')
     
     with col3:
         # State statistics table
         st.markdown("#### 📊 State Statistics")
-        stats_df = state_summary.nlargest(10, 'Avg Risk Score')[['State', 'Avg Risk Score', 'District Count']]
+        stats_df = top_k(state_summary, 10, 'Avg Risk Score')[['State', 'Avg Risk Score', 'District Count']]
         stats_df['Avg Risk Score'] = stats_df['Avg Risk Score'].round(1)
         
         st.dataframe(
@@ -6,8 +6,42 @@ Advanced data cleansing report and quality metrics.
 
 import streamlit as st
 import plotly.graph_objects as go
+import components.charts  # registers the default chart template
+from components.styles import render_card_grid, alert_card_html
 
 
+@st.cache_data(show_spinner=False)
+def _quality_fig(quality_dist):
+    """Quality rating distribution bar chart for one dataset's report"""
+    fig_quality = go.Figure(go.Bar(
+        x=list(quality_dist.keys()),
+        y=list(quality_dist.values()),
+        marker_color=['#ff4757', '#ffa502', '#2ed573', '#667eea'],
+        text=list(quality_dist.values()),
+        textposition='outside'
+    ))
+    fig_quality.update_layout(
+        title='Quality Rating Distribution',
+        height=300,
+        xaxis_title="Quality Rating",
+        yaxis_title="Count"
+    )
+    return fig_quality
+
+
+@st.cache_data(show_spinner=False)
+def _summary_cards_html(totals):
+    """Summary card HTML for one (rows before, rows after, rows removed, removal rate) tuple"""
+    rows_before, rows_after, rows_removed, removal_rate = totals
+    return [
+        alert_card_html('Rows Processed', f"{rows_before:,}", '#667eea', size='2rem'),
+        alert_card_html('Rows Retained', f"{rows_after:,}", '#2ed573', size='2rem'),
+        alert_card_html('Anomalies Removed', f"{rows_removed:,}", '#ff4757', size='2rem'),
+        alert_card_html('Removal Rate', f"{removal_rate:.1f}%", '#ffa502', size='2rem')
+    ]
+
+
+@st.fragment
 def render_quality_tab(cleansing_report):
     """Render the Data Quality tab content"""
     st.markdown("### 🧹 Advanced Data Cleansing Report")
@@ -16,39 +50,12 @@ def render_quality_tab(cleansing_report):
         report = cleansing_report
         
         # Summary cards
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid #667eea; text-align: center;'>
-                <div class='stat-label'>Rows Processed</div>
-                <div class='big-stat' style='color: #667eea; font-size: 2rem;'>{report['total_rows_before']:,}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid #2ed573; text-align: center;'>
-                <div class='stat-label'>Rows Retained</div>
-                <div class='big-stat' style='color: #2ed573; font-size: 2rem;'>{report['total_rows_after']:,}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid #ff4757; text-align: center;'>
-                <div class='stat-label'>Anomalies Removed</div>
-                <div class='big-stat' style='color: #ff4757; font-size: 2rem;'>{report['rows_removed']:,}</div>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            st.markdown(f"""
-            <div class='metric-card' style='border-left: 4px solid #ffa502; text-align: center;'>
-                <div class='stat-label'>Removal Rate</div>
-                <div class='big-stat' style='color: #ffa502; font-size: 2rem;'>{report['removal_rate']:.1f}%</div>
-            </div>
-            """, unsafe_allow_html=True)
+        render_card_grid(_summary_cards_html((
+            report['total_rows_before'],
+            report['total_rows_after'],
+            report['rows_removed'],
+            report['removal_rate']
+        )), 4)
         
         st.markdown("---")
         
@@ -96,24 +103,7 @@ def render_quality_tab(cleansing_report):
                         # Quality distribution chart
                         quality_dist = quality_info.get('quality_distribution', {})
                         if quality_dist:
-                            fig_quality = go.Figure(go.Bar(
-                                x=list(quality_dist.keys()),
-                                y=list(quality_dist.values()),
-                                marker_color=['#ff4757', '#ffa502', '#2ed573', '#667eea'],
-                                text=list(quality_dist.values()),
-                                textposition='outside'
-                            ))
-                            fig_quality.update_layout(
-                                title='Quality Rating Distribution',
-                                height=300,
-                                template='plotly_white',
-                                plot_bgcolor='rgba(255,255,255,0.9)',
-                                paper_bgcolor='rgba(0,0,0,0)',
-                                margin=dict(t=50, b=40, l=40, r=40),
-                                xaxis_title="Quality Rating",
-                                yaxis_title="Count"
-                            )
-                            st.plotly_chart(fig_quality, use_container_width=True)
+                            st.plotly_chart(_quality_fig(quality_dist), use_container_width=True)
         
         st.markdown("---")
         st.markdown("""
@@ -9,88 +9,281 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import components.charts  # registers the default chart template
 
 
+# Histogram bin count, the per-trace point cap for violins, the CDF curve resolution
+# and the largest correlation matrix that still gets per-cell value labels
+HIST_BINS = 25
+VIOLIN_MAX_POINTS = 5000
+CDF_MAX_POINTS = 512
+HEATMAP_TEXT_MAX = 8
+
+
+def _binned_bars(values, name):
+    """Histogram pre-binned with NumPy, so the figure carries bin counts instead of every value"""
+    vals = values.to_numpy(dtype=np.float64)
+    counts, edges = np.histogram(vals[~np.isnan(vals)], bins=HIST_BINS)
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        name=name,
+        marker_color='#667eea',
+        opacity=0.7
+    )
+
+
+def _capped(values):
+    """Seeded random sample of at most VIOLIN_MAX_POINTS values for a violin trace"""
+    if len(values) <= VIOLIN_MAX_POINTS:
+        return values
+    return np.random.default_rng(0).choice(values, VIOLIN_MAX_POINTS, replace=False)
+
+
+@st.cache_data(show_spinner=False)
+def _violin_fig(df):
+    """Anomaly score violin per risk level"""
+    fig_violin = go.Figure()
+    scores_by_level = dict(tuple(df.groupby('risk_level', observed=True)['anomaly_score']))
+    for risk in ['NORMAL', 'HIGH', 'CRITICAL']:
+        risk_data = scores_by_level.get(risk)
+        if risk_data is not None and len(risk_data) > 0:
+            fig_violin.add_trace(go.Violin(
+                y=_capped(risk_data.to_numpy()),
+                name=risk,
+                box_visible=True,
+                meanline_visible=True,
+                fillcolor='rgba(255,71,87,0.5)' if risk == 'CRITICAL' else ('rgba(255,165,2,0.5)' if risk == 'HIGH' else 'rgba(46,213,115,0.5)'),
+                line_color='#ff4757' if risk == 'CRITICAL' else ('#ffa502' if risk == 'HIGH' else '#2ed573')
+            ))
+    
+    fig_violin.update_layout(
+        title='Anomaly Score Distribution by Risk Level',
+        height=400,
+        yaxis_title="Anomaly Score",
+        showlegend=True
+    )
+    return fig_violin
+
+
+@st.cache_data(show_spinner=False)
+def _hist_fig(values, name):
+    """Pre-binned distribution of a percentage column"""
+    fig_hist = go.Figure()
+    fig_hist.add_trace(_binned_bars(values, name))
+    
+    fig_hist.update_layout(
+        title=f'{name} Distribution',
+        height=400,
+        xaxis_title=f"{name} (%)",
+        yaxis_title="Frequency",
+        showlegend=False
+    )
+    return fig_hist
+
+
+@st.cache_data(show_spinner=False)
+def _metrics_box_fig(df):
+    """Anomaly score vs compliance rate box comparison"""
+    # Long format in one reshape: every anomaly score, then every compliance rate
+    metrics_df = (df[['anomaly_score', 'compliance_rate']]
+                  .rename(columns=lambda c: c.replace('_', ' ').title())
+                  .melt(var_name='Metric', value_name='Value'))
+    fig_multi_box = px.box(
+        metrics_df,
+        x='Metric',
+        y='Value',
+        color='Metric',
+        title='Key Metrics Distribution Comparison',
+        height=400,
+        color_discrete_map={
+            'Anomaly Score': '#ff4757',
+            'Compliance Rate': '#667eea'
+        }
+    )
+    return fig_multi_box
+
+
+@st.cache_data(show_spinner=False)
+def _risk_box_fig(df):
+    """Anomaly score box per risk level"""
+    fig_multi_box = px.box(
+        df,
+        y='anomaly_score',
+        color='risk_level',
+        title='Anomaly Score by Risk Category',
+        height=400,
+        color_discrete_map={'CRITICAL': '#ff4757', 'HIGH': '#ffa502', 'NORMAL': '#2ed573'}
+    )
+    return fig_multi_box
+
+
+@st.cache_data(show_spinner=False)
+def _ridge_fig(sorted_scores, quartiles):
+    """Ridge-style violins of the scores below each quartile"""
+    fig_ridge = go.Figure()
+    
+    percentiles = [25, 50, 75]
+    for i, pct in enumerate(percentiles):
+        # Scores at or below the quartile are a prefix of the sorted array
+        subset = sorted_scores[:np.searchsorted(sorted_scores, quartiles[i], side='right')]
+        
+        fig_ridge.add_trace(go.Violin(
+            x=_capped(subset),
+            name=f'{pct}th Percentile',
+            orientation='h',
+            side='positive',
+            line_color=['#2ed573', '#ffa502', '#ff4757'][i]
+        ))
+    
+    fig_ridge.update_layout(
+        title='Anomaly Score Percentile Distribution',
+        height=400,
+        xaxis_title="Anomaly Score",
+        yaxis_title="Percentile Group"
+    )
+    return fig_ridge
+
+
+@st.cache_data(show_spinner=False)
+def _heatmap_fig(df):
+    """Correlation matrix heatmap of the multi-dataset metrics"""
+    # The metrics are gap-free after analysis, so a plain Pearson matrix matches df.corr();
+    # a constant column still yields NaN rather than a warning
+    arr = np.nan_to_num(df.to_numpy(dtype=np.float64))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = np.corrcoef(arr, rowvar=False)
+    labels = [col.replace('_', ' ').title() for col in df.columns]
+    # Value labels are one text node per cell, so larger matrices show colour only
+    text_kwargs = dict(
+        text=corr.round(2),
+        texttemplate='%{text}',
+        textfont={"size": 12}
+    ) if len(labels) <= HEATMAP_TEXT_MAX else {}
+    
+    fig_heatmap = go.Figure(data=go.Heatmap(
+        z=corr,
+        x=labels,
+        y=labels,
+        colorscale='RdBu_r',
+        zmid=0,
+        colorbar=dict(title="Correlation"),
+        **text_kwargs
+    ))
+    
+    fig_heatmap.update_layout(
+        title='Metric Correlation Matrix',
+        height=400,
+        margin=dict(t=50, b=80, l=80, r=40)
+    )
+    return fig_heatmap
+
+
+@st.cache_data(show_spinner=False)
+def _cdf_fig(sorted_scores):
+    """Cumulative distribution of the anomaly scores"""
+    n = len(sorted_scores)
+    # Evenly spaced ranks (first and last included) trace the same curve with a bounded point count
+    idx = np.linspace(0, n - 1, CDF_MAX_POINTS).astype(np.int64) if n > CDF_MAX_POINTS else np.arange(n)
+    cumulative = (idx + 1) / n * 100
+    
+    fig_cdf = go.Figure()
+    fig_cdf.add_trace(go.Scatter(
+        x=sorted_scores[idx],
+        y=cumulative,
+        mode='lines',
+        fill='tozeroy',
+        line=dict(color='#667eea', width=2),
+        name='CDF'
+    ))
+    
+    fig_cdf.update_layout(
+        title='Cumulative Distribution',
+        height=300,
+        margin=dict(t=40, b=40, l=40, r=10),
+        xaxis_title="Anomaly Score",
+        yaxis_title="Cumulative %"
+    )
+    return fig_cdf
+
+
+@st.cache_data(show_spinner=False)
+def _range_fig(scores):
+    """District counts per Low/Medium/High score range"""
+    bins = [0, 30, 60, 100]
+    labels = ['Low', 'Medium', 'High']
+    # Fixed Low/Medium/High order so each bar keeps its own colour
+    range_counts = pd.cut(scores, bins=bins, labels=labels).value_counts().reindex(labels, fill_value=0)
+    
+    fig_range = go.Figure(go.Bar(
+        x=range_counts.index,
+        y=range_counts.values,
+        marker_color=['#2ed573', '#ffa502', '#ff4757'],
+        text=range_counts.values,
+        textposition='outside'
+    ))
+    
+    fig_range.update_layout(
+        title='Score Range Distribution',
+        height=300,
+        margin=dict(t=40, b=40, l=40, r=10),
+        xaxis_title="Score Range",
+        yaxis_title="Count"
+    )
+    return fig_range
+
+
+@st.cache_data(show_spinner=False)
+def _outlier_fig(sorted_scores, quartiles):
+    """Box plot of all scores with the IQR outlier count in the title"""
+    Q1, _, Q3 = quartiles
+    IQR = Q3 - Q1
+    # Outliers sit at both ends of the sorted array
+    n_outliers = (np.searchsorted(sorted_scores, Q1 - 1.5 * IQR, side='left')
+                  + len(sorted_scores) - np.searchsorted(sorted_scores, Q3 + 1.5 * IQR, side='right'))
+    
+    fig_outlier = go.Figure()
+    fig_outlier.add_trace(go.Box(
+        y=sorted_scores,
+        name='All Data',
+        marker_color='#667eea',
+        boxpoints='outliers'
+    ))
+    
+    fig_outlier.update_layout(
+        title=f'Outlier Detection ({n_outliers} outliers)',
+        height=300,
+        margin=dict(t=40, b=40, l=40, r=10),
+        yaxis_title="Anomaly Score",
+        showlegend=False
+    )
+    return fig_outlier
+
+
+@st.fragment
 def render_trends_tab(data, files_count):
     """Render the Trends & Statistics tab content"""
     st.markdown("### 📈 Statistical Trends & Distribution Analysis")
     
+    # Sorted once: the quartiles, ridge subsets, CDF and outlier fences all read from it
+    scores = data['anomaly_score'].to_numpy(dtype=np.float64)
+    sorted_scores = np.sort(scores[~np.isnan(scores)])
+    quartiles = np.quantile(sorted_scores, [0.25, 0.5, 0.75])
+    
     # Top row - Main distribution charts
     col1, col2 = st.columns(2)
     
     with col1:
         # Violin plot for anomaly score by risk level
-        fig_violin = go.Figure()
-        for risk in ['NORMAL', 'HIGH', 'CRITICAL']:
-            risk_data = data[data['risk_level'] == risk]['anomaly_score']
-            if len(risk_data) > 0:
-                fig_violin.add_trace(go.Violin(
-                    y=risk_data,
-                    name=risk,
-                    box_visible=True,
-                    meanline_visible=True,
-                    fillcolor='rgba(255,71,87,0.5)' if risk == 'CRITICAL' else ('rgba(255,165,2,0.5)' if risk == 'HIGH' else 'rgba(46,213,115,0.5)'),
-                    line_color='#ff4757' if risk == 'CRITICAL' else ('#ffa502' if risk == 'HIGH' else '#2ed573')
-                ))
-        
-        fig_violin.update_layout(
-            title='Anomaly Score Distribution by Risk Level',
-            height=400,
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=50, b=40, l=40, r=40),
-            yaxis_title="Anomaly Score",
-            showlegend=True
-        )
-        st.plotly_chart(fig_violin, use_container_width=True)
+        st.plotly_chart(_violin_fig(data[['risk_level', 'anomaly_score']]), use_container_width=True)
     
     with col2:
         # Enhanced histogram with KDE overlay
         if 'compliance_rate' in data.columns:
-            fig_hist = go.Figure()
-            fig_hist.add_trace(go.Histogram(
-                x=data['compliance_rate'],
-                nbinsx=25,
-                name='Compliance Rate',
-                marker_color='#667eea',
-                opacity=0.7
-            ))
-            
-            fig_hist.update_layout(
-                title='Compliance Rate Distribution',
-                height=400,
-                template='plotly_white',
-                plot_bgcolor='rgba(255,255,255,0.9)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                margin=dict(t=50, b=40, l=40, r=40),
-                xaxis_title="Compliance Rate (%)",
-                yaxis_title="Frequency",
-                showlegend=False
-            )
-            st.plotly_chart(fig_hist, use_container_width=True)
+            st.plotly_chart(_hist_fig(data['compliance_rate'], 'Compliance Rate'), use_container_width=True)
         else:
-            fig_hist = go.Figure()
-            fig_hist.add_trace(go.Histogram(
-                x=data['youth_ratio'],
-                nbinsx=25,
-                name='Youth Ratio',
-                marker_color='#667eea',
-                opacity=0.7
-            ))
-            
-            fig_hist.update_layout(
-                title='Youth Ratio Distribution',
-                height=400,
-                template='plotly_white',
-                plot_bgcolor='rgba(255,255,255,0.9)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                margin=dict(t=50, b=40, l=40, r=40),
-                xaxis_title="Youth Ratio (%)",
-                yaxis_title="Frequency",
-                showlegend=False
-            )
-            st.plotly_chart(fig_hist, use_container_width=True)
+            st.plotly_chart(_hist_fig(data['youth_ratio'], 'Youth Ratio'), use_container_width=True)
     
     st.markdown("---")
     
@@ -100,70 +293,14 @@ def render_trends_tab(data, files_count):
     with col1:
         # Multi-metric box plot comparison
         if files_count >= 2 and 'compliance_rate' in data.columns:
-            metrics_data = []
-            for metric in ['anomaly_score', 'compliance_rate']:
-                for val in data[metric]:
-                    metrics_data.append({'Metric': metric.replace('_', ' ').title(), 'Value': val})
-            
-            metrics_df = pd.DataFrame(metrics_data)
-            fig_multi_box = px.box(
-                metrics_df,
-                x='Metric',
-                y='Value',
-                color='Metric',
-                title='Key Metrics Distribution Comparison',
-                height=400,
-                color_discrete_map={
-                    'Anomaly Score': '#ff4757',
-                    'Compliance Rate': '#667eea'
-                }
-            )
+            fig_multi_box = _metrics_box_fig(data[['anomaly_score', 'compliance_rate']])
         else:
-            fig_multi_box = px.box(
-                data,
-                y='anomaly_score',
-                color='risk_level',
-                title='Anomaly Score by Risk Category',
-                height=400,
-                color_discrete_map={'CRITICAL': '#ff4757', 'HIGH': '#ffa502', 'NORMAL': '#2ed573'}
-            )
-        
-        fig_multi_box.update_layout(
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=50, b=40, l=40, r=40)
-        )
+            fig_multi_box = _risk_box_fig(data[['anomaly_score', 'risk_level']])
         st.plotly_chart(fig_multi_box, use_container_width=True)
     
     with col2:
         # Ridge plot style - multiple distributions
-        fig_ridge = go.Figure()
-        
-        percentiles = [25, 50, 75]
-        for i, pct in enumerate(percentiles):
-            threshold = data['anomaly_score'].quantile(pct / 100)
-            subset = data[data['anomaly_score'] <= threshold]
-            
-            fig_ridge.add_trace(go.Violin(
-                x=subset['anomaly_score'],
-                name=f'{pct}th Percentile',
-                orientation='h',
-                side='positive',
-                line_color=['#2ed573', '#ffa502', '#ff4757'][i]
-            ))
-        
-        fig_ridge.update_layout(
-            title='Anomaly Score Percentile Distribution',
-            height=400,
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=50, b=40, l=40, r=40),
-            xaxis_title="Anomaly Score",
-            yaxis_title="Percentile Group"
-        )
-        st.plotly_chart(fig_ridge, use_container_width=True)
+        st.plotly_chart(_ridge_fig(sorted_scores, quartiles), use_container_width=True)
     
     # Correlation heatmap (if multiple datasets)
     if files_count >= 2:
@@ -174,29 +311,7 @@ def render_trends_tab(data, files_count):
         
         with col1:
             numeric_cols = ['enrol_total', 'demo_total', 'bio_total', 'compliance_rate', 'anomaly_score']
-            corr_data = data[numeric_cols].corr()
-            
-            fig_heatmap = go.Figure(data=go.Heatmap(
-                z=corr_data.values,
-                x=[col.replace('_', ' ').title() for col in corr_data.columns],
-                y=[col.replace('_', ' ').title() for col in corr_data.index],
-                colorscale='RdBu_r',
-                zmid=0,
-                text=corr_data.values.round(2),
-                texttemplate='%{text}',
-                textfont={"size": 12},
-                colorbar=dict(title="Correlation")
-            ))
-            
-            fig_heatmap.update_layout(
-                title='Metric Correlation Matrix',
-                height=400,
-                template='plotly_white',
-                plot_bgcolor='rgba(255,255,255,0.9)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                margin=dict(t=50, b=80, l=80, r=40)
-            )
-            st.plotly_chart(fig_heatmap, use_container_width=True)
+            st.plotly_chart(_heatmap_fig(data[numeric_cols]), use_container_width=True)
         
         with col2:
             # Statistical summary table
@@ -212,82 +327,12 @@ def render_trends_tab(data, files_count):
     
     with col1:
         # Cumulative distribution
-        sorted_scores = np.sort(data['anomaly_score'])
-        cumulative = np.arange(1, len(sorted_scores) + 1) / len(sorted_scores) * 100
-        
-        fig_cdf = go.Figure()
-        fig_cdf.add_trace(go.Scatter(
-            x=sorted_scores,
-            y=cumulative,
-            mode='lines',
-            fill='tozeroy',
-            line=dict(color='#667eea', width=2),
-            name='CDF'
-        ))
-        
-        fig_cdf.update_layout(
-            title='Cumulative Distribution',
-            height=300,
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=40, l=40, r=10),
-            xaxis_title="Anomaly Score",
-            yaxis_title="Cumulative %"
-        )
-        st.plotly_chart(fig_cdf, use_container_width=True)
+        st.plotly_chart(_cdf_fig(sorted_scores), use_container_width=True)
     
     with col2:
         # Score range analysis
-        bins = [0, 30, 60, 100]
-        labels = ['Low', 'Medium', 'High']
-        data_copy = data.copy()
-        data_copy['Score Range'] = pd.cut(data_copy['anomaly_score'], bins=bins, labels=labels)
-        range_counts = data_copy['Score Range'].value_counts()
-        
-        fig_range = go.Figure(go.Bar(
-            x=range_counts.index,
-            y=range_counts.values,
-            marker_color=['#2ed573', '#ffa502', '#ff4757'],
-            text=range_counts.values,
-            textposition='outside'
-        ))
-        
-        fig_range.update_layout(
-            title='Score Range Distribution',
-            height=300,
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=40, l=40, r=10),
-            xaxis_title="Score Range",
-            yaxis_title="Count"
-        )
-        st.plotly_chart(fig_range, use_container_width=True)
+        st.plotly_chart(_range_fig(data['anomaly_score']), use_container_width=True)
     
     with col3:
         # Outlier detection visualization
-        Q1 = data['anomaly_score'].quantile(0.25)
-        Q3 = data['anomaly_score'].quantile(0.75)
-        IQR = Q3 - Q1
-        outliers = data[(data['anomaly_score'] < (Q1 - 1.5 * IQR)) | (data['anomaly_score'] > (Q3 + 1.5 * IQR))]
-        
-        fig_outlier = go.Figure()
-        fig_outlier.add_trace(go.Box(
-            y=data['anomaly_score'],
-            name='All Data',
-            marker_color='#667eea',
-            boxpoints='outliers'
-        ))
-        
-        fig_outlier.update_layout(
-            title=f'Outlier Detection ({len(outliers)} outliers)',
-            height=300,
-            template='plotly_white',
-            plot_bgcolor='rgba(255,255,255,0.9)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            margin=dict(t=40, b=40, l=40, r=10),
-            yaxis_title="Anomaly Score",
-            showlegend=False
-        )
-        st.plotly_chart(fig_outlier, use_container_width=True)
\ No newline at end of file
+        st.plotly_chart(_outlier_fig(sorted_scores, quartiles), use_container_width=True)
\ No newline at end of file
@@ -4,159 +4,216 @@ SENTINEL AI - Data Processing Utilities
 Functions for loading, cleaning, and analyzing Aadhaar datasets.
 """
 
+import io
+import string
+
 import pandas as pd
 import numpy as np
+import polars as pl
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from utils.numba_kernels import district_scores, RISK_LABELS
+
+
+# Files above this size are read in chunks by the C-parser fallback
+CSV_CHUNK_BYTES = 100_000_000
+
+# Identifier and date columns left out of the per-district totals
+IGNORE_COLS = ('date', 'state', 'district', 'pincode')
+
+# Single-pass lowercase + underscore-to-space mapping for column headers
+_COL_TRANS = str.maketrans({'_': ' ', **{c: c.lower() for c in string.ascii_uppercase}})
+
+
+def read_csv_fast(file):
+    """Parse an uploaded CSV with Polars' multithreaded reader into pandas"""
+    raw = file.getvalue()
+    try:
+        return pl.read_csv(raw, infer_schema_length=10000).to_pandas()
+    except pl.exceptions.PolarsError:
+        pass
+    
+    # Fall back to pandas for files Polars can't infer a schema for:
+    # the multithreaded Arrow parser first, then the C parser
+    try:
+        return pd.read_csv(io.BytesIO(raw), engine='pyarrow')
+    except (ImportError, ValueError):
+        if len(raw) < CSV_CHUNK_BYTES:
+            return pd.read_csv(io.BytesIO(raw), engine='c', low_memory=False)
+        reader = pd.read_csv(io.BytesIO(raw), engine='c', low_memory=False, chunksize=500_000)
+        return pd.concat(reader, ignore_index=True)
+
+
+def iter_csv_batches(file, batch_size=100_000):
+    """Yield an uploaded CSV as pandas frames of at most batch_size rows"""
+    raw = file.getvalue()
+    lf = pl.scan_csv(io.BytesIO(raw), infer_schema_length=10000)
+    try:
+        lf.collect_schema()
+    except pl.exceptions.PolarsError:
+        # Fall back to pandas' chunked reader for files Polars can't infer a schema for
+        yield from pd.read_csv(io.BytesIO(raw), chunksize=batch_size)
+        return
+    rows_done = 0
+    try:
+        for batch in lf.collect_batches(chunk_size=batch_size):
+            frame = batch.to_pandas()
+            rows_done += len(frame)
+            yield frame
+    except pl.exceptions.PolarsError:
+        # A cell past the inference window broke the schema: like read_csv_fast, fall
+        # back to pandas, continuing from the first row not yet yielded
+        yield from pd.read_csv(io.BytesIO(raw), skiprows=range(1, rows_done + 1), chunksize=batch_size)
+
+
+def normalize_columns(columns):
+    """Strip, lowercase and space-separate column headers via a translation table"""
+    return columns.str.strip().str.translate(_COL_TRANS)
+
+
+def normalize_labels(series):
+    """Trim and title-case a text column with Arrow's vectorized UTF-8 kernels"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.StringDtype) and dtype.storage == 'pyarrow':
+        # Already Arrow-backed: the .str methods run Arrow kernels without a round trip
+        return series.str.strip().str.title()
+    arr = pa.array(series, from_pandas=True)
+    result = pc.utf8_title(pc.utf8_trim_whitespace(arr)).to_pandas()
+    result.index = series.index
+    return result
 
 
 def load_and_clean(file):
     """Load and perform basic cleaning on CSV file"""
     if file is None:
         return None
-    df = pd.read_csv(file)
-    df.columns = [c.strip().lower().replace('_', ' ') for c in df.columns]
+    df = read_csv_fast(file)
+    df.columns = normalize_columns(df.columns)
     
     for col in ['state', 'district']:
         if col in df.columns:
-            df[col] = df[col].str.strip().str.title()
+            df[col] = normalize_labels(df[col])
     
     return df
 
 
+def _numeric_values(df):
+    """Value columns coerced to numbers once; unparseable cells become NaN"""
+    value_cols = [col for col in df.columns if col.lower() not in IGNORE_COLS]
+    # Columns the CSV readers already typed pass through; the rest are coerced in one block
+    text_cols = [col for col in value_cols if not pd.api.types.is_numeric_dtype(df[col].dtype)]
+    values = df[value_cols]
+    if text_cols:
+        values[text_cols] = df[text_cols].apply(pd.to_numeric, errors='coerce')
+    return values
+
+
+def _district_states(df):
+    """State of each district's first row, indexed by district"""
+    if 'state' not in df.columns:
+        return pd.Series('Unknown', index=df['district'].drop_duplicates())
+    return df[['district', 'state']].drop_duplicates('district').set_index('district')['state'].fillna('Unknown')
+
+
+def _risk_level(anomaly_score):
+    """Risk band per score: CRITICAL above 60, HIGH above 30, NORMAL otherwise"""
+    return np.select([anomaly_score > 60, anomaly_score > 30], ['CRITICAL', 'HIGH'], default='NORMAL')
+
+
 def analyze_single_dataset(df, dtype):
     """Analyze patterns in a single dataset"""
     if 'district' not in df.columns:
         return None
     
-    results = []
-    grouped = df.groupby('district')
+    # One grouped sum over every value column instead of a to_numeric per district and column
+    sums = _numeric_values(df).groupby(df['district']).sum()
+    record_count = df.groupby('district').size().to_numpy()
     
-    for district, group in grouped:
-        state = group.iloc[0].get('state', 'Unknown') if 'state' in group.columns else 'Unknown'
-        
-        ignore_cols = ['date', 'state', 'district', 'pincode']
-        total = 0
-        youth_total = 0
-        adult_total = 0
-        
-        for col in group.columns:
-            if col.lower() in ignore_cols:
-                continue
-            try:
-                col_sum = pd.to_numeric(group[col], errors='coerce').sum()
-                if not pd.isna(col_sum):
-                    total += col_sum
-                    if '5' in col or '17' in col:
-                        youth_total += col_sum
-                    elif '18' in col or 'greater' in col.lower():
-                        adult_total += col_sum
-            except:
-                continue
-        
-        record_count = len(group)
-        avg_per_record = total / record_count if record_count > 0 else 0
-        youth_ratio = (youth_total / total * 100) if total > 0 else 0
-        
-        volume_score = min(total / 10000, 40)
-        demographic_score = 20 if youth_ratio > 60 or youth_ratio < 20 else 0
-        frequency_score = 30 if record_count > 100 else (15 if record_count > 50 else 0)
-        
-        anomaly_score = volume_score + demographic_score + frequency_score
-        risk_level = 'CRITICAL' if anomaly_score > 60 else ('HIGH' if anomaly_score > 30 else 'NORMAL')
-        
-        results.append({
-            'district': district,
-            'state': state,
-            'total_updates': total,
-            'youth_updates': youth_total,
-            'adult_updates': adult_total,
-            'record_count': record_count,
-            'avg_per_record': avg_per_record,
-            'youth_ratio': youth_ratio,
-            'anomaly_score': anomaly_score,
-            'risk_level': risk_level,
-            'dataset_type': dtype
-        })
-    
-    return pd.DataFrame(results).sort_values('anomaly_score', ascending=False)
+    youth_cols = [col for col in sums.columns if '5' in col or '17' in col]
+    adult_cols = [col for col in sums.columns
+                  if col not in youth_cols and ('18' in col or 'greater' in col.lower())]
+    total = sums.sum(axis=1).to_numpy()
+    youth_total = sums[youth_cols].sum(axis=1).to_numpy()
+    adult_total = sums[adult_cols].sum(axis=1).to_numpy()
+    
+    state = _district_states(df).reindex(sums.index).to_numpy()
+    
+    avg_per_record = total / record_count
+    
+    # Ratio, score and risk band fused in one compiled pass over the districts
+    n = len(total)
+    youth_ratio = np.empty(n)
+    anomaly_score = np.empty(n)
+    codes = np.empty(n, dtype=np.int8)
+    district_scores(total.astype(np.float64), youth_total.astype(np.float64), record_count,
+                    youth_ratio, anomaly_score, codes)
+    risk_level = RISK_LABELS[codes]
+    
+    # Highest score first: one integer argsort gathered into each column (ties keep district order)
+    order = np.argsort(-anomaly_score, kind='stable')
+    
+    return pd.DataFrame({
+        'district': sums.index.to_numpy()[order],
+        'state': state[order],
+        'total_updates': total[order],
+        'youth_updates': youth_total[order],
+        'adult_updates': adult_total[order],
+        'record_count': record_count[order],
+        'avg_per_record': avg_per_record[order],
+        'youth_ratio': youth_ratio[order],
+        'anomaly_score': anomaly_score[order],
+        'risk_level': risk_level[order],
+        'dataset_type': dtype
+    })
 
 
 def analyze_multiple_datasets(enrol_df, demo_df, bio_df):
     """Compare multiple datasets"""
-    district_map = {}
-    
-    datasets = [
-        (enrol_df, 'enrol'),
-        (demo_df, 'demo'),
-        (bio_df, 'bio')
-    ]
+    sums = []
+    states = []
     
-    for df, dtype in datasets:
-        if df is None:
+    for df, name in [(enrol_df, 'enrol_total'), (demo_df, 'demo_total'), (bio_df, 'bio_total')]:
+        if df is None or 'district' not in df.columns:
             continue
         
-        if 'district' not in df.columns:
-            continue
-            
-        grouped = df.groupby('district')
-        
-        for district, group in grouped:
-            if district not in district_map:
-                state = group.iloc[0].get('state', 'Unknown') if 'state' in group.columns else 'Unknown'
-                district_map[district] = {
-                    'district': district,
-                    'state': state,
-                    'enrol_total': 0,
-                    'demo_total': 0,
-                    'bio_total': 0
-                }
-            
-            ignore_cols = ['date', 'state', 'district', 'pincode']
-            for col in group.columns:
-                if col.lower() in ignore_cols:
-                    continue
-                
-                try:
-                    col_sum = pd.to_numeric(group[col], errors='coerce').sum()
-                    if not pd.isna(col_sum):
-                        if dtype == 'enrol':
-                            district_map[district]['enrol_total'] += col_sum
-                        elif dtype == 'demo':
-                            district_map[district]['demo_total'] += col_sum
-                        elif dtype == 'bio':
-                            district_map[district]['bio_total'] += col_sum
-                except:
-                    continue
-    
-    results = []
-    for district, data in district_map.items():
-        gap = data['demo_total'] - data['bio_total']
-        compliance_rate = (data['bio_total'] / data['demo_total'] * 100) if data['demo_total'] > 0 else 100
-        migration_index = (data['demo_total'] / data['enrol_total']) if data['enrol_total'] > 0 else 0
-        
-        anomaly_score = 0
-        if gap > 0:
-            anomaly_score += min(gap / 1000, 50)
-        if compliance_rate < 50:
-            anomaly_score += 30
-        elif compliance_rate < 80:
-            anomaly_score += 15
-        if migration_index > 2:
-            anomaly_score += 20
-        
-        risk_level = 'CRITICAL' if anomaly_score > 60 else ('HIGH' if anomaly_score > 30 else 'NORMAL')
-        
-        results.append({
-            'district': district,
-            'state': data['state'],
-            'enrol_total': data['enrol_total'],
-            'demo_total': data['demo_total'],
-            'bio_total': data['bio_total'],
-            'gap': gap,
-            'gap_abs': abs(gap),
-            'compliance_rate': compliance_rate,
-            'migration_index': migration_index,
-            'anomaly_score': anomaly_score,
-            'risk_level': risk_level
-        })
-    
-    return pd.DataFrame(results).sort_values('anomaly_score', ascending=False)
\ No newline at end of file
+        # One coercion and one grouped sum per dataset, added up across its value columns
+        sums.append(_numeric_values(df).groupby(df['district']).sum().sum(axis=1).rename(name))
+        states.append(_district_states(df))
+    
+    # The outer join keeps first-seen district order (enrol, then demo, then bio);
+    # each district takes its state from the first dataset it appears in
+    merged = pd.concat(sums, axis=1).reindex(columns=['enrol_total', 'demo_total', 'bio_total']).fillna(0)
+    state = pd.concat(states)
+    state = state[~state.index.duplicated()]
+    
+    enrol = merged['enrol_total'].to_numpy()
+    demo = merged['demo_total'].to_numpy()
+    bio = merged['bio_total'].to_numpy()
+    
+    gap = demo - bio
+    compliance_rate = np.divide(bio, demo, out=np.full(len(demo), 1.0), where=demo > 0) * 100
+    migration_index = np.divide(demo, enrol, out=np.zeros(len(enrol)), where=enrol > 0)
+    
+    anomaly_score = (
+        np.where(gap > 0, np.minimum(gap / 1000, 50), 0)
+        + np.select([compliance_rate < 50, compliance_rate < 80], [30, 15], default=0)
+        + np.where(migration_index > 2, 20, 0)
+    )
+    
+    # Highest score first: one integer argsort gathered into each column (ties keep district order)
+    order = np.argsort(-anomaly_score, kind='stable')
+    
+    return pd.DataFrame({
+        'district': merged.index.to_numpy()[order],
+        'state': state.reindex(merged.index).to_numpy()[order],
+        'enrol_total': enrol[order],
+        'demo_total': demo[order],
+        'bio_total': bio[order],
+        'gap': gap[order],
+        'gap_abs': np.abs(gap)[order],
+        'compliance_rate': compliance_rate[order],
+        'migration_index': migration_index[order],
+        'anomaly_score': anomaly_score[order],
+        'risk_level': _risk_level(anomaly_score)[order]
+    })
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+SENTINEL AI - Compiled Kernels
+===============================
+Numba-compiled per-district scoring loops.
+"""
+
+import numpy as np
+from numba import njit
+
+# Risk level by kernel code
+RISK_LABELS = np.array(['NORMAL', 'HIGH', 'CRITICAL'])
+
+
+@njit(cache=True)
+def district_scores(total, youth, record_count, out_ratio, out_score, out_code):
+    """Youth ratio, anomaly score and risk code per district in one pass"""
+    for i in range(total.shape[0]):
+        t = total[i]
+        ratio = youth[i] / t * 100 if t > 0 else 0.0
+        out_ratio[i] = ratio
+        
+        # Volume (capped at 40) + skewed demographics (20) + update frequency (15/30)
+        score = min(t / 10000, 40.0)
+        if ratio > 60 or ratio < 20:
+            score += 20
+        if record_count[i] > 100:
+            score += 30
+        elif record_count[i] > 50:
+            score += 15
+        out_score[i] = score
+        
+        out_code[i] = 2 if score > 60 else (1 if score > 30 else 0)